@@ -3,10 +3,25 @@ import json
 import re
 import os
 from datetime import datetime
-import copy
 from collections import defaultdict
 import argparse
+import glob
+import heapq
+import shlex
+from bisect import bisect_left
 import sys
+from snapshot import file_fingerprint, load_snapshot, save_snapshot, INTERVAL_SNAPSHOT_FILE, SEARCH_SNAPSHOT_FILE, SHARD_SNAPSHOT_FILE
+from room_index import Meeting, RoomIndexBuilder, SLOTS_PER_DAY, iter_bits, iter_runs, slot_range_mask
+from room_intervals import IntervalScheduleBuilder, MINUTES_PER_DAY
+from mapped_index import index_file_for, load_mapped_index, write_mapped_index
+from building_search import BuildingSearch
+from location_resolver import LocationResolver
+from course_stream import iter_json_records
+from course_shards import load_manifest, load_shard, shards_match
+from schedule_store import ScheduleStore
+from codes import codes
+from query_server import DEFAULT_PORT, query_server, serve
+import profiling
 
 
 # === CONFIGURATION ===
@@ -19,21 +34,12 @@ EQUAL_SIGN_LENGTH = (FIRST_COL_WIDTH+SECOND_COL_WIDTH)+25  # Length of the '=' s
 DAYS = ['M', 'T', 'W', 'Th', 'F', 'Sat']
 ROOM_ENDINGS = ["B","LL","L", "G"]
 EARLIEST_START = "9:00am"
+MIN_FREE_MINUTES = 20  # Shortest window worth reporting at minute precision (two 10-minute slots)
+TOP_ROOMS_TO_DISPLAY = 10  # Rooms shown by the "best rooms" ranking
+PREFERRED_BUILDING_WEIGHT = 1.5  # How much longer a preferred-building room's free time counts when ranking
 UNNEEDED_WORDS = ["hall", "building", "for", "and", "of", "the"]
-
-
-def extract_building_prefix(location, building_names):
-    """Extracts the building prefix from a location, handling 'B' and 'LL' corrections."""
-    match = re.match(r"^([A-Za-z]+)(\d+[A-Za-z]?)$", location)
-    if match:
-        prefix = match.group(1)
-        
-        for ending in ROOM_ENDINGS:
-            if prefix.endswith(ending) and prefix[:-(len(ending))] in building_names:
-                return prefix[:-(len(ending))]
-
-        return prefix  
-    return None
+COURSES_FILE = "courses.json"
+BUILDINGS_FILE = "buildings.json"
 
 
 def truncate_name(name, max_length):
@@ -107,8 +113,8 @@ def print_buildings_table(buildings_list):
 
     print("=" * separator_length)
 
-def time_to_value(time):
-    """Converts a time string (e.g., '12:00 PM') to a numerical value."""
+def time_to_minutes(time):
+    """Converts a time string (e.g., '12:00 PM') to minutes after midnight."""
     try:
         time = time.strip().lower()
         day = "pm" in time
@@ -119,10 +125,17 @@ def time_to_value(time):
         if hour < 1 or hour > 12 or minute < 0 or minute >= 60:
             return None  # Invalid time
         hour = hour % 12 + (12 * day)
-        return (hour * 60 + minute) // 10  # Convert to value (divide by 10)
+        return hour * 60 + minute
     except ValueError:
         return None
 
+def time_to_value(time):
+    """Converts a time string (e.g., '12:00 PM') to a numerical value."""
+    minutes = time_to_minutes(time)
+    if minutes is None:
+        return None
+    return minutes // 10  # Convert to value (divide by 10)
+
 def value_to_time(value):
     """Converts a numerical value back to a time string."""
     value *= 10  # Convert back to minutes
@@ -134,9 +147,13 @@ def value_to_time(value):
     time_str = f"{hour}:{minute:02} {period}"
     return "Midnight" if time_str == "11:50 PM" else time_str  # Convert 11:50 PM to Midnight
 
-def split_days(schedule):
-    """Extracts valid days from a schedule string."""
-    return list(dict.fromkeys(re.findall(r'Th|M|T|W|F|Sat', schedule)))  # Remove duplicates
+def minutes_to_time(minutes):
+    """Converts minutes after midnight back to a time string; the end of the day is Midnight."""
+    if minutes >= MINUTES_PER_DAY:
+        return "Midnight"
+    hour, minute = divmod(minutes, 60)
+    period = "PM" if hour >= 12 else "AM"
+    return f"{hour % 12 or 12}:{minute:02} {period}"
 
 def find_negative_sequences(arr, min_length=2, earliest=EARLIEST_START):
     """Finds contiguous free time slots (-1s) within the specified time range."""
@@ -159,32 +176,191 @@ def find_negative_sequences(arr, min_length=2, earliest=EARLIEST_START):
 
     return sequences
 
-def free_times(rooms, room_prefix, day, specific_time=None):
+def clip_free_window(start, end, time_val, min_length=2, earliest=EARLIEST_START):
+    """Applies find_negative_sequences' rules to the free run (start, end) around time_val; returns its end or None."""
+    start = max(start, time_to_value(earliest))
+    if end - start < min_length or time_val < start:
+        return None
+    if end == SLOTS_PER_DAY:
+        end -= 1  # Same as find_negative_sequences: a window running to midnight ends on the last slot
+    return end if time_val < end else None
+
+def available_until(index, room_id, day, time_val, min_length=2, earliest=EARLIEST_START):
+    """Returns the slot at which a room stops being free after time_val, or None if it isn't free then."""
+    window = index.free_window_at(room_id, day, time_val)
+    if window is None:
+        return None
+    return clip_free_window(*window, time_val, min_length, earliest)
+
+def rooms_free_at(index, room_prefix, day, time_val):
+    """Returns (room, end_slot) for every room matching the prefix that is free at time_val, in room order."""
+    if day not in index.day_ids:
+        return []
+
+    # Check every matching room at once, then look up how long each free one stays free
+    results = []
+    candidates = index.prefix_mask(room_prefix.upper())
+    for room_id in iter_bits(index.free_rooms_mask(day, time_val, candidates)):
+        end = available_until(index, room_id, day, time_val)
+        if end is not None:
+            results.append((index.rooms[room_id], end))
+    return results
+
+def room_free_windows(index, room_prefix, day):
+    """Returns (room, free windows) for every room matching the prefix that has a free window on day."""
+    if day not in index.day_ids:
+        return []
+
+    results = []
+    for room in index.rooms_with_prefix(room_prefix.upper()):
+        free_slots = find_negative_sequences(index.slots(room, day))
+        if free_slots:
+            results.append((room, free_slots))
+    return results
+
+def best_rooms(index, room_prefix, day, time_val, k=TOP_ROOMS_TO_DISPLAY, preferred=None, preferred_weight=PREFERRED_BUILDING_WEIGHT):
+    """Returns the k (room, end_slot) pairs that stay free longest after time_val, weighting preferred rooms, best first."""
+    if day not in index.day_ids or k <= 0:
+        return []
+
+    preferred_lo, preferred_hi = index.prefix_range(preferred.upper()) if preferred else (0, 0)
+
+    def scored():
+        candidates = index.prefix_mask(room_prefix.upper())
+        for room_id in iter_bits(index.free_rooms_mask(day, time_val, candidates)):
+            end = available_until(index, room_id, day, time_val)
+            if end is not None:
+                weight = preferred_weight if preferred_lo <= room_id < preferred_hi else 1
+                yield (end - time_val) * weight, -room_id, end
+
+    return [(index.rooms[-negative_id], end) for _, negative_id, end in heapq.nlargest(k, scored())]
+
+def rooms_free_recurring(index, room_prefix, days, start, end, min_length=None):
+    """Returns (room, windows) for rooms free inside start..end on all of days, in windows of at least min_length slots."""
+    if min_length is None:
+        min_length = end - start
+    window = slot_range_mask(start, end)
+    if not window or any(day not in index.day_ids for day in days):
+        return []
+
+    results = []
+    for room_id in range(*index.prefix_range(room_prefix.upper())):
+        free = window & ~index.union_mask(room_id, days)
+        windows = [(run_start, min(run_end, SLOTS_PER_DAY - 1))  # Midnight is shown as the last slot
+                   for run_start, run_end in iter_runs(free) if run_end - run_start >= max(min_length, 1)]
+        if windows:
+            results.append((index.rooms[room_id], windows))
+    return results
+
+def print_free_at(results):
+    for room, end in results:
+        print(f"{room} available until {value_to_time(end)}")
+
+def print_free_windows(results):
+    # Show all free slots for today
+    for room, free_slots in results:
+        print(f"\n{room} available:")
+        for start, end in free_slots:
+            print(f"{value_to_time(start)} to {value_to_time(end)}")
+
+def free_times(index, room_prefix, day, specific_time=None):
     """Displays free times for rooms that match the prefix in the new format."""
-    matched_rooms = sorted([r for r in rooms.keys() if r.startswith(room_prefix.upper())])
-    
-    if not matched_rooms:
+    matched = index.prefix_count(room_prefix.upper())
+    profiling.count("queries")
+    profiling.count("rooms_scanned", matched)
+    if not matched:
         print(f"No rooms found matching '{room_prefix}'.")
         return
 
-    for room in matched_rooms:
-        if day not in rooms[room]:
-            continue
-        
-        free_slots = find_negative_sequences(rooms[room][day])
-        
+    with profiling.phase("free_times"):
         if specific_time is not None:
-            # Find the first free slot that includes the specific time
-            for start, end in free_slots:
-                if start <= specific_time < end:
-                    print(f"{room} available until {value_to_time(end)}")
-                    break
+            results = rooms_free_at(index, room_prefix, day, specific_time)
+            print_free_at(results)
         else:
-            # Show all free slots for today
-            if(free_slots):
-                print(f"\n{room} available:")
-                for start, end in free_slots:
-                    print(f"{value_to_time(start)} to {value_to_time(end)}")
+            results = room_free_windows(index, room_prefix, day)
+            print_free_windows(results)
+    profiling.count("rooms_reported", len(results))
+
+def precise_rooms_free_at(schedule, room_prefix, day, minute, min_length=MIN_FREE_MINUTES, earliest=EARLIEST_START):
+    """Returns (room, end_minute) for every room matching the prefix that is free at minute, in room order."""
+    if day not in schedule.day_ids:
+        return []
+
+    earliest_minute = time_to_minutes(earliest)
+    results = []
+    for room_id in range(*schedule.prefix_range(room_prefix.upper())):
+        window = schedule.free_window_at(room_id, day, minute)
+        if window is None:
+            continue
+        start, end = max(window[0], earliest_minute), window[1]
+        if end - start >= min_length and start <= minute < end:
+            results.append((schedule.rooms[room_id], end))
+    return results
+
+def precise_room_free_windows(schedule, room_prefix, day, min_length=MIN_FREE_MINUTES, earliest=EARLIEST_START):
+    """Returns (room, free windows in minutes) for every room matching the prefix that has one on day."""
+    if day not in schedule.day_ids:
+        return []
+
+    earliest_minute = time_to_minutes(earliest)
+    results = []
+    for room_id in range(*schedule.prefix_range(room_prefix.upper())):
+        windows = schedule.free_windows(room_id, day, earliest_minute, min_length)
+        if windows:
+            results.append((schedule.rooms[room_id], windows))
+    return results
+
+def precise_free_times(schedule, room_prefix, day, minute=None):
+    """Same as free_times, at minute precision from an IntervalSchedule."""
+    if not schedule.prefix_count(room_prefix.upper()):
+        print(f"No rooms found matching '{room_prefix}'.")
+        return
+
+    if minute is not None:
+        for room, end in precise_rooms_free_at(schedule, room_prefix, day, minute):
+            print(f"{room} available until {minutes_to_time(end)}")
+    else:
+        for room, windows in precise_room_free_windows(schedule, room_prefix, day):
+            print(f"\n{room} available:")
+            for start, end in windows:
+                print(f"{minutes_to_time(start)} to {minutes_to_time(end)}")
+
+def print_best_rooms(index, room_prefix, day, time_val, k=TOP_ROOMS_TO_DISPLAY, preferred=None):
+    """Prints the k rooms matching the prefix that stay free longest after time_val."""
+    if not index.prefix_count(room_prefix.upper()):
+        print(f"No rooms found matching '{room_prefix}'.")
+        return
+    print_free_at(best_rooms(index, room_prefix, day, time_val, k, preferred))
+
+def store_free_times(store, room_prefix, day, specific_time=None):
+    """Same output as free_times, answered with indexed queries against a ScheduleStore."""
+    matched_rooms = store.rooms_with_prefix(room_prefix.upper())
+
+    if not matched_rooms:
+        print(f"No rooms found matching '{room_prefix}'.")
+        return
+
+    if day not in DAYS:
+        return
+
+    if specific_time is not None:
+        results = []
+        for room, run_start, next_busy in store.free_windows_at(room_prefix.upper(), day, specific_time):
+            end = clip_free_window(run_start, SLOTS_PER_DAY if next_busy is None else next_busy, specific_time)
+            if end is not None:
+                results.append((room, end))
+        print_free_at(results)
+        return
+
+    results = []
+    for room in matched_rooms:
+        slots = [-1] * SLOTS_PER_DAY
+        for start, end in store.busy_ranges(room, day):
+            slots[start:end] = [1] * (end - start)
+        free_slots = find_negative_sequences(slots)
+        if free_slots:
+            results.append((room, free_slots))
+    print_free_windows(results)
 
 def clear_screen():
     """Clears the terminal screen."""
@@ -199,6 +375,11 @@ def get_current_time_value():
     time_str = f"{hour}:{minute:02} {period}"
     return time_to_value(time_str)
 
+def get_current_minute():
+    """Gets the current time in minutes after midnight."""
+    now = datetime.now()
+    return now.hour * 60 + now.minute
+
 def get_valid_day():
     """Prompts the user for a valid day input."""
     while True:
@@ -217,26 +398,117 @@ def get_valid_time():
             return time_val
         print("Invalid time format! Please enter a valid time (e.g., 2:30pm).")
 
-def process_raw_data():
+def expand_meetings(section_id, course, resolver, building_room_counts, building_course_counts, buildings, room_prefix=""):
+    """Yields one Meeting per location and time range of a section, updating the building counters as it goes."""
+    if room_prefix and room_prefix not in course["location"].upper():
+        return  # Cheap early out: none of this section's rooms can match
 
-    # Load course data
-    try:
-        with open('courses.json', 'r') as file:
-            raw_courses = json.load(file)
-    except FileNotFoundError:
-        print("Error: courses.json file not found!")
-        exit(1)
+    locations = resolver.locations(course["location"])
+    profile = profiling.active()  # Counted only when profiling, since this runs for every section
+    if profile:
+        profile.count("location_matches", len(locations))
+    if not locations:
+        return
+
+    time_ranges = resolver.time_ranges(course["time"])
+    if not time_ranges:
+        return
+    days = resolver.days(course["days"])
 
+    for location, room, building_prefix in locations:
+        if room_prefix and not room.startswith(room_prefix):
+            continue
+        if profile:
+            profile.count("time_matches", len(time_ranges))
+        if building_prefix:
+            building_room_counts[building_prefix].add(location)
+            building_course_counts[building_prefix] = building_course_counts.get(building_prefix, 0) + 1
+            buildings.add(building_prefix.upper())
+
+        for start, end in time_ranges:
+            if start is None or end is None:
+                print("FAILED2: ", course["time"])
+                quit()
+
+            yield Meeting(section_id, room, start, end, days)
+
+def location_resolver(building_names, precise=False):
+    """Returns a LocationResolver parsing times to slots, or to minutes when precise is set."""
+    return LocationResolver(building_names, time_to_minutes if precise else time_to_value, ROOM_ENDINGS)
+
+def load_building_names():
+    """Loads buildings.json as a {CODE: NAME} dictionary."""
     # Load building names data (NEW JSON FORMAT: {"name": ..., "code": ...})
     try:
-        with open('buildings.json', 'r') as file:
+        with open(BUILDINGS_FILE, 'r') as file:
             raw_building_data = json.load(file)
     except FileNotFoundError:
         print("Error: buildings.json file not found!")
         exit(1)
 
     # Convert JSON into a dictionary mapping {CODE: NAME}
-    building_names = {entry["code"]: entry["name"] for entry in raw_building_data}
+    return {entry["code"]: entry["name"] for entry in raw_building_data}
+
+def load_building_search():
+    """Loads the building name search index, rebuilding it only when buildings.json changed."""
+    cached = load_snapshot([BUILDINGS_FILE], SEARCH_SNAPSHOT_FILE)
+    if cached is not None:
+        return cached
+    search = BuildingSearch(load_building_names())
+    save_snapshot(search, [BUILDINGS_FILE], SEARCH_SNAPSHOT_FILE)
+    return search
+
+def resolve_building_name(query, search, room_count):
+    """Returns the (code, name, score) buildings a free-text query names, best first, keeping only ones with rooms."""
+    prefix = query.strip().upper()
+    if not prefix or room_count(prefix) or prefix in search.code_ids:
+        return []
+    return [match for match in search.search(query) if room_count(match[0].upper())]
+
+def local_room_counter(load):
+    """Returns a room_count for resolve_building_name over load(prefix) indexes: the query's own, then the full one if needed."""
+    loaded = []
+
+    def room_count(prefix):
+        if not loaded:
+            loaded.append(load(prefix))  # The query's own rooms, which answering it needs anyway
+        elif not prefix.startswith(loaded[-1].coverage):
+            loaded.append(load(""))  # A building name: its candidates are elsewhere on campus
+        return loaded[-1].prefix_count(prefix)
+    return room_count
+
+def server_room_counter(query, port=DEFAULT_PORT):
+    """Returns a room_count for resolve_building_name from one /search call, or None if the server did not answer."""
+    payload = query_server("/search", {"q": query}, port=port)
+    if payload is None:
+        return None
+    counts = {building["code"].upper(): building["rooms"] for building in payload["buildings"]}
+    counts[query.strip().upper()] = payload["matched"]
+    return lambda prefix: counts.get(prefix, 0)
+
+def summarize_buildings(building_names, building_room_counts, building_course_counts):
+    """Returns the (code, name, unique rooms, courses) rows shown in the buildings table."""
+    # Convert set counts to actual integer counts
+    building_room_counts = {code: len(rooms) for code, rooms in building_room_counts.items()}
+
+    # Keep only buildings that actually have classes and meet the minimum room requirement
+    filtered_buildings = [
+        (code, building_names[code], count, building_course_counts[code])
+        for code, count in building_room_counts.items()
+        if count >= MIN_ROOMS_TO_DISPLAY and building_course_counts[code] >= MIN_COURSES_TO_DISPLAY
+    ]
+
+    # Sort by number of **unique rooms** (descending)
+    return sorted(filtered_buildings, key=lambda x: x[3], reverse=True)
+
+def courses_file_for(term=None):
+    """Returns the courses file of a term (courses.json for the default term)."""
+    return f"courses_{term}.json" if term else COURSES_FILE
+
+def process_raw_data(room_prefix="", precise=False, courses_file_path=COURSES_FILE):
+    """Builds the room index (only rooms under room_prefix) and the buildings table from courses.json."""
+    with profiling.phase("load_building_names"):
+        building_names = load_building_names()
 
     # Count how many **unique rooms** exist in each building
     building_room_counts = defaultdict(set)
@@ -246,79 +518,377 @@ def process_raw_data():
     # SCA214 SCAB105 SCESTG1 
 
 
-    courses = []
-    rooms = {}
     buildings = set()
+    builder = IntervalScheduleBuilder(DAYS) if precise else RoomIndexBuilder(DAYS)
+    resolver = location_resolver(building_names, precise)
 
+    # Open course data; sections are streamed one at a time instead of loading the whole file
+    try:
+        courses_file = open(courses_file_path, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        print(f"Error: {courses_file_path} file not found!")
+        exit(1)
 
     # Process course data to count how many **unique rooms** exist in each building
-    for course in raw_courses:
-        loc_matches = re.finditer(r"([A-Za-z]+)(\d+[A-Za-z]?)", course["location"])
-        
-        for loc_match in loc_matches:
-            location = loc_match.group(0)
-            
-            time_pattern = r"(\d{2}:\d{2}(?:am|pm))-(\d{2}:\d{2}(?:am|pm))"
-            time_matches = list(re.finditer(time_pattern, course["time"]))
-            if time_matches:
-                course["location"] = location
-                building_prefix = extract_building_prefix(location, building_names)
-                if building_prefix and building_prefix in building_names:
-                    building_room_counts[building_prefix].add(location) 
-                    building_course_counts[building_prefix] = building_course_counts.get(building_prefix, 0) + 1
-                
-                    
-                    buildings.add(building_prefix.upper())
-                for time_match in time_matches:
-                    start_time = time_match.group(1)
-                    end_time = time_match.group(2)
-
-                    if not start_time or not end_time:
-                        print("FAILED: ", course["time"])
-                        quit()
-                        
-                    course_copy = copy.deepcopy(course)
-                    course_copy["location"] = location
-                    course_copy["start_time"] = start_time
-                    course_copy["end_time"] = end_time            
-                    course_copy["days"] = split_days(course_copy["days"])
+    sections = meetings = slots_written = 0
+    with courses_file, profiling.phase("expand_meetings"):
+        for section_id, course in enumerate(iter_json_records(courses_file)):
+            sections += 1
+            for meeting in expand_meetings(section_id, course, resolver, building_room_counts, building_course_counts, buildings, room_prefix):
+                builder.add_meeting(meeting.room, meeting.days, meeting.start, meeting.end)
+                meetings += 1
+                slots_written += max(meeting.end - meeting.start, 0) * len(meeting.days)
+    profiling.count("sections_read", sections)
+    profiling.count("meetings_expanded", meetings)
+    profiling.count("minutes_written" if precise else "slots_written", slots_written)
+    resolver.record_stats()
+
+    with profiling.phase("build_index"):
+        index = builder.build(coverage=room_prefix)
+    with profiling.phase("summarize_buildings"):
+        sorted_buildings = summarize_buildings(building_names, building_room_counts, building_course_counts)
                     
-                    courses.append(course_copy)
+    return index, sorted_buildings
+
+def ingest_department(code, sections_hash, resolver):
+    """Expands one department shard into compact meeting tuples plus its building counters."""
+    building_room_counts = defaultdict(set)
+    building_course_counts = {}
+    meetings = []
+
+    for section_id, course in enumerate(load_shard(code)):
+        for meeting in expand_meetings(section_id, course, resolver, building_room_counts, building_course_counts, set()):
+            meetings.append((meeting.room, meeting.start, meeting.end, tuple(meeting.days)))
+
+    return {
+        "hash": sections_hash,
+        "meetings": meetings,
+        "room_counts": dict(building_room_counts),
+        "course_counts": building_course_counts,
+    }
+
+def merge_department_counts(departments):
+    """Combines the per-department building counters into campus-wide ones."""
+    building_room_counts = defaultdict(set)
+    building_course_counts = defaultdict(int)
+    for department in departments.values():
+        for code, locations in department["room_counts"].items():
+            building_room_counts[code] |= locations
+        for code, count in department["course_counts"].items():
+            building_course_counts[code] += count
+    return building_room_counts, building_course_counts
+
+def build_room_masks(departments, only_rooms=None):
+    """Accumulates the meetings of every department (optionally just some rooms) into a builder."""
+    builder = RoomIndexBuilder(DAYS)
+    for department in departments.values():
+        for room, start, end, days in department["meetings"]:
+            if only_rooms is None or room in only_rooms:
+                builder.add_meeting(room, days, start, end)
+    return builder
+
+def load_sharded_index():
+    """Loads the index from per-department shards, re-ingesting and patching only departments that changed."""
+    manifest = load_manifest()
+    cached = load_snapshot([BUILDINGS_FILE], SHARD_SNAPSHOT_FILE)
+    if cached is not None:
+        departments, index = cached["departments"], cached["index"]
+    else:
+        departments, index = {}, None
+
+    # Only the departments of codes.py, like assemble_courses_json, so the index matches courses.json
+    changed = [code for code in codes if code in manifest
+               and (code not in departments or departments[code]["hash"] != manifest[code]["sections_hash"])]
+    removed = [code for code in departments if code not in manifest or code not in codes]
+    if index is not None and not changed and not removed:
+        return index, cached["sorted_buildings"]
+
+    building_names = load_building_names()
+    resolver = location_resolver(building_names)
+
+    # Rooms touched by the old or new meetings of changed departments are the only ones to patch
+    affected_rooms = set()
+    for code in changed + removed:
+        if code in departments:
+            affected_rooms.update(meeting[0] for meeting in departments[code]["meetings"])
+    for code in removed:
+        del departments[code]
+    for code in changed:
+        departments[code] = ingest_department(code, manifest[code]["sections_hash"], resolver)
+        affected_rooms.update(meeting[0] for meeting in departments[code]["meetings"])
+
+    if index is not None:
+        patched = build_room_masks(departments, affected_rooms).room_masks
+        if all(room in index for room in patched) and all(room in patched for room in affected_rooms if room in index):
+            index.update_rooms(patched)
+        else:
+            index = None  # A room appeared or disappeared, so room ids must be reassigned
+    if index is None:
+        index = build_room_masks(departments).build()
+
+    resolver.record_stats()
+    sorted_buildings = summarize_buildings(building_names, *merge_department_counts(departments))
+    save_snapshot({"departments": departments, "index": index, "sorted_buildings": sorted_buildings},
+                  [BUILDINGS_FILE], SHARD_SNAPSHOT_FILE)
+    return index, sorted_buildings
+
+def interval_snapshot_for(term=None, coverage=""):
+    """Returns the precise schedule snapshot of a term, or of one room prefix of it."""
+    path = INTERVAL_SNAPSHOT_FILE.replace(".pickle", f"_{term}.pickle") if term else INTERVAL_SNAPSHOT_FILE
+    return path.replace(".pickle", f"@{coverage}.pickle") if coverage else path
+
+def cached_coverages(room_prefix):
+    """Returns the coverages whose cached index could answer room_prefix: the whole campus first, then longest prefix first."""
+    leading = [room_prefix[:end] for end in range(len(room_prefix), 0, -1)]
+    return [""] + [prefix for prefix in leading if prefix.isalnum()]
+
+def remove_partial_indexes(term, precise):
+    """Deletes the per-prefix indexes of a term once its complete index has been written."""
+    pattern = interval_snapshot_for(term, "*") if precise else index_file_for(term, "*")
+    for path in glob.glob(pattern):
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # Still mapped by another process on Windows; it is stale either way
+
+def load_index(room_prefix="", precise=False, term=None):
+    """Loads rooms and buildings for room_prefix ("" for all) from the on-disk index, rebuilding it only when an input changed."""
+    courses_file = courses_file_for(term)
+    input_files = [courses_file, BUILDINGS_FILE]
+    room_prefix = room_prefix.upper()
+
+    with profiling.phase("load_snapshot"):
+        for coverage in cached_coverages(room_prefix):
+            if precise:
+                cached = load_snapshot(input_files, interval_snapshot_for(term, coverage))
+            else:
+                cached = load_mapped_index(index_file_for(term, coverage), input_files)
+            if cached is not None and room_prefix.startswith(cached[0].coverage):
+                return cached
 
-    for course_id, course in enumerate(courses):
-        room = course["location"].upper()  # Ensure case insensitivity
-        if room not in rooms:
-            rooms[room] = {}
+    if not precise and not term and shards_match(courses_file):
+        with profiling.phase("load_sharded_index"):
+            index, sorted_buildings = load_sharded_index()
+    else:
+        with profiling.phase("process_raw_data"):
+            index, sorted_buildings = process_raw_data(room_prefix, precise, courses_file)
+    coverage = index.coverage
+    if coverage and not (coverage.isalnum() and len(index)):
+        return index, sorted_buildings  # Not worth a file of its own (no rooms, or not a usable file name)
+    with profiling.phase("save_snapshot"):
+        if precise:
+            save_snapshot((index, sorted_buildings), input_files, interval_snapshot_for(term, coverage))
+        else:
+            try:
+                write_mapped_index(index_file_for(term, coverage), index, sorted_buildings, input_files)
+            except OSError as e:
+                print(f"Warning: could not write index file ({e})")
+        if not coverage:
+            remove_partial_indexes(term, precise)
+    return index, sorted_buildings
+
+def build_store(db_path):
+    """Writes courses.json and buildings.json into a fresh SQLite store at db_path."""
+    building_names = load_building_names()
 
-        start = time_to_value(course["start_time"])
-        end = time_to_value(course["end_time"])
-        
-        if start is None or end is None:
-            print("FAILED2: ",course["start_time"], course["end_time"])
-            quit()
-
-        for day in DAYS:
-            if day not in rooms[room]:
-                rooms[room][day] = [-1] * 144  # 10-min slots from 8:00 AM to Midnight
-            if day in course["days"]:
-                for i in range(start, end):
-                    rooms[room][day][i] = course_id
-                    
-    
-    # Convert set counts to actual integer counts
-    building_room_counts = {code: len(rooms) for code, rooms in building_room_counts.items()}
+    try:
+        courses_file = open(COURSES_FILE, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        print("Error: courses.json file not found!")
+        exit(1)
 
-    # Keep only buildings that actually have classes and meet the minimum room requirement
-    filtered_buildings = [
-        (code, building_names[code], count, building_course_counts[code])
-        for code, count in building_room_counts.items()
-        if count >= MIN_ROOMS_TO_DISPLAY and building_course_counts[code] >= MIN_COURSES_TO_DISPLAY
-    ]
+    # Build next to the target and swap it in, so readers never see a half-built store
+    temp_path = db_path + ".tmp"
+    store = ScheduleStore.create(temp_path)
+    store.add_buildings(building_names)
+    resolver = location_resolver(building_names)
+    with courses_file:
+        counters = (defaultdict(set), {}, set())
+        store.add_sections(
+            (section_id, course, list(expand_meetings(section_id, course, resolver, *counters)))
+            for section_id, course in enumerate(iter_json_records(courses_file))
+        )
+    store.close()
+    os.replace(temp_path, db_path)
+
+def slot_param(params):
+    """Reads the query time from API parameters: a raw 'slot' or a 'time' string (default: now)."""
+    if "slot" in params:
+        slot = int(params["slot"])
+        if not 0 <= slot < SLOTS_PER_DAY:
+            raise ValueError(f"Invalid slot: {slot}")
+        return slot
+    return parse_time_string(params.get("time", "now"))
+
+def until_json(room, end):
+    return {"room": room, "until_slot": end, "until": value_to_time(end)}
+
+def windows_json(windows):
+    return [{"start_slot": start, "end_slot": end, "start": value_to_time(start), "end": value_to_time(end)}
+            for start, end in windows]
+
+def input_fingerprints(term=None):
+    """Returns the fingerprints of the files a term's index is built from, or None if one is missing."""
+    try:
+        return [list(file_fingerprint(path)) for path in (courses_file_for(term), BUILDINGS_FILE)]
+    except OSError:
+        return None
 
-    # Sort by number of **unique rooms** (descending)
-    sorted_buildings = sorted(filtered_buildings, key=lambda x: x[3], reverse=True)
-                    
-    return rooms, sorted_buildings
+def api_handler(index, sorted_buildings, search=None, term=None):
+    """Builds the route handler the query server uses to answer from an already loaded index."""
+    inputs = input_fingerprints(term)
+
+    def handle(route, params):
+        try:
+            if route == "/health":
+                return 200, {"rooms": len(index), "term": term, "inputs": inputs}
+            if route == "/search" and search is not None:
+                matches = search.search(params["q"], int(params.get("limit", 5)))
+                return 200, {"matched": index.prefix_count(params["q"].strip().upper()),
+                             "buildings": [{"code": code, "name": name, "score": score, "rooms": index.prefix_count(code.upper())}
+                                           for code, name, score in matches]}
+            if route == "/buildings":
+                return 200, {"buildings": [{"code": code, "name": name, "rooms": rooms, "courses": courses}
+                                           for code, name, rooms, courses in sorted_buildings]}
+
+            day = parse_day_string(params["day"]) if "day" in params else get_current_day()
+            if route == "/free":
+                prefix = params.get("prefix", "").upper()
+                time_val = slot_param(params)
+                rooms = rooms_free_at(index, prefix, day, time_val)
+                return 200, {"matched": index.prefix_count(prefix), "day": day, "time": value_to_time(time_val),
+                             "rooms": [until_json(room, end) for room, end in rooms]}
+            if route == "/until":
+                room = params["room"].upper()
+                if room not in index:
+                    return 404, {"error": f"Unknown room: {room}"}
+                time_val = slot_param(params)
+                end = available_until(index, index.room_ids[room], day, time_val) if day else None
+                return 200, {"room": room, "day": day, "time": value_to_time(time_val), "free": end is not None,
+                             "until_slot": end, "until": value_to_time(end) if end is not None else None}
+            if route == "/best":
+                prefix = params.get("prefix", "").upper()
+                time_val = slot_param(params)
+                rooms = best_rooms(index, prefix, day, time_val, int(params.get("k", TOP_ROOMS_TO_DISPLAY)), params.get("prefer"))
+                return 200, {"matched": index.prefix_count(prefix), "day": day, "time": value_to_time(time_val),
+                             "rooms": [until_json(room, end) for room, end in rooms]}
+            if route == "/recurring":
+                prefix = params.get("prefix", "").upper()
+                days = parse_days_string(params["days"])
+                start, end = parse_window_string(params["between"]) if "between" in params else (time_to_value(EARLIEST_START), SLOTS_PER_DAY)
+                min_length = -(-int(params["min_length"]) // 10) if "min_length" in params else None
+                rooms = rooms_free_recurring(index, prefix, days, start, end, min_length)
+                return 200, {"matched": index.prefix_count(prefix), "days": days,
+                             "rooms": [{"room": room, "windows": windows_json(windows)} for room, windows in rooms]}
+            if route == "/windows":
+                prefix = params.get("prefix", "").upper()
+                rooms = room_free_windows(index, prefix, day)
+                return 200, {"matched": index.prefix_count(prefix), "day": day,
+                             "rooms": [{"room": room, "windows": windows_json(windows)} for room, windows in rooms]}
+        except (KeyError, ValueError) as e:
+            return 400, {"error": f"Bad request: {e}"}
+        return 404, {"error": f"Unknown route: {route}"}
+
+    return handle
+
+def server_serves(port=DEFAULT_PORT, term=None):
+    """Returns True if a query server is running on port with the data this process would load itself."""
+    health = query_server("/health", {}, port=port)
+    # Not another term, nor loaded before courses.json or buildings.json last changed
+    return health is not None and health.get("term") == term and health.get("inputs") == input_fingerprints(term)
+
+def print_server_answer(room_prefix, day, time_val, port=DEFAULT_PORT, term=None):
+    """Prints the answer from a running query server; returns False if none is running or it serves other data."""
+    if not server_serves(port, term):
+        return False
+
+    params = {"prefix": room_prefix, "day": day}
+    if time_val is not None:
+        params["slot"] = time_val
+    payload = query_server("/free" if time_val is not None else "/windows", params, port=port)
+    if payload is None:
+        return False
+
+    if not payload["matched"]:
+        print(f"No rooms found matching '{room_prefix}'.")
+    elif time_val is not None:
+        print_free_at([(entry["room"], entry["until_slot"]) for entry in payload["rooms"]])
+    else:
+        print_free_windows([(entry["room"], [(w["start_slot"], w["end_slot"]) for w in entry["windows"]])
+                            for entry in payload["rooms"]])
+    return True
+
+def parse_batch_query(line, parser):
+    """Parses one batch line into (prefix, day, time value or None for a full-day view)."""
+    if line.startswith("{"):
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("Expected a JSON object")
+        query, at, day, full = request.get("query"), request.get("at"), request.get("day"), request.get("full", False)
+        for field, value in (("query", query), ("at", at), ("day", day)):
+            if value is not None and not isinstance(value, str):
+                raise ValueError(f'"{field}" must be a string')
+        if not isinstance(full, bool):
+            raise ValueError('"full" must be true or false')
+        query = query or ""
+    else:
+        args = parser.parse_args(shlex.split(line))
+        query, at, day, full = args.query or "", args.at, args.day, args.full
+
+    day = parse_day_string(day) if day else get_current_day()
+    if not day:
+        raise ValueError("No day given and there are no classes today")
+    time_val = None if full else parse_time_string(at or "now")
+    return query.upper(), day, time_val
+
+def batch_record(header, room_fragments):
+    """Serializes one batch result whose "rooms" list is made of already-encoded JSON fragments."""
+    return json.dumps(header)[:-1] + ', "rooms": [' + ", ".join(room_fragments) + "]}\n"
+
+def run_batch(index, lines, out):
+    """Answers every query in lines against one loaded index and writes one NDJSON result per query."""
+    parser = build_query_parser(BatchQueryParser, add_help=False)
+    groups = defaultdict(list)
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            prefix, day, time_val = parse_batch_query(line, parser)
+        except ValueError as e:
+            out.write(json.dumps({"id": line_number, "error": str(e)}) + "\n")
+            continue
+        groups[(day, time_val)].append((line_number, prefix))
+
+    for (day, time_val), queries in groups.items():
+        fragments = {}
+
+        if time_val is not None:
+            free_ids = list(iter_bits(index.free_rooms_mask(day, time_val)))
+            for line_number, prefix in queries:
+                lo, hi = index.prefix_range(prefix)
+                parts = []
+                for room_id in free_ids[bisect_left(free_ids, lo):bisect_left(free_ids, hi)]:
+                    if room_id not in fragments:
+                        end = available_until(index, room_id, day, time_val)
+                        fragments[room_id] = json.dumps(until_json(index.rooms[room_id], end)) if end is not None else None
+                    if fragments[room_id] is not None:
+                        parts.append(fragments[room_id])
+                out.write(batch_record({"id": line_number, "query": prefix, "day": day, "time": value_to_time(time_val),
+                                        "matched": hi - lo}, parts))
+        else:
+            for line_number, prefix in queries:
+                lo, hi = index.prefix_range(prefix)
+                parts = []
+                for room_id in range(lo, hi):
+                    if room_id not in fragments:
+                        room = index.rooms[room_id]
+                        windows = find_negative_sequences(index.slots(room, day))
+                        fragments[room_id] = json.dumps({"room": room, "windows": windows_json(windows)}) if windows else None
+                    if fragments[room_id] is not None:
+                        parts.append(fragments[room_id])
+                out.write(batch_record({"id": line_number, "query": prefix, "day": day, "full": True,
+                                        "matched": hi - lo}, parts))
 
 def clean_day(day):
     match = re.match(r'TH|M|T|W|F|SAT|SAT', day.strip().upper())
@@ -331,17 +901,30 @@ def get_current_day():
     day = datetime.now().strftime("%a")
     return clean_day(day)
 
-def main_loop():
+def main_loop(term=None):
     """Main CLI loop."""
-    rooms, sorted_buildings = process_raw_data()
+    index, sorted_buildings = load_index(term=term)
+    search = load_building_search()
     while True:
         clear_screen()
         print("========= Empty Classroom Finder =========")
         print_buildings_table(sorted_buildings)
 
-        room_prefix = input("Enter a room or building name (or leave blank to see all): ").strip().upper()
-        if room_prefix and not any(r.startswith(room_prefix) for r in rooms.keys()):
+        room_prefix = input("Enter a room or building name (or leave blank to see all): ").strip()
+        # Not a code: look the text up as a building name ("taper", "salvatori hall")
+        matches = resolve_building_name(room_prefix, search, index.prefix_count)
+        if matches:
+            code, name, _ = matches[0]
+            print(f"Showing {name} ({code})")
+            if len(matches) > 1:
+                print("Other matches: " + ", ".join(f"{other} ({other_code})" for other_code, other, _ in matches[1:]))
+            room_prefix = code
+        room_prefix = room_prefix.upper()
+        if room_prefix and not index.prefix_count(room_prefix):
             print(f"Error: No rooms or buildings found matching '{room_prefix}'.")
+            suggestion = index.closest_prefix(room_prefix)
+            if suggestion:
+                print(f"Did you mean '{suggestion}'? ({index.prefix_count(suggestion)} rooms start with it)")
             input("\nPress Enter to try again...")
             continue
 
@@ -349,14 +932,15 @@ def main_loop():
         print("1. Right now")
         print("2. At a specific time")
         print("3. See full availability for today")
+        print(f"4. Best {TOP_ROOMS_TO_DISPLAY} rooms right now")
         choice = input("> ").strip()
         
 
         if choice == "1":
             current_time_value = get_current_time_value()
-            current_day = datetime.now().strftime("%a")[0]  # Get the current day as M/T/W/Th/F/Sat
+            current_day = get_current_day()  # Get the current day as M/T/W/Th/F/Sat
             print(f"\nChecking rooms available at {value_to_time(current_time_value)} today ({current_day})...\n")
-            free_times(rooms, room_prefix, current_day, current_time_value)
+            free_times(index, room_prefix, current_day, current_time_value)
 
         elif choice == "2":
             print("\nEnter time (e.g., 2:00 PM):")
@@ -364,7 +948,7 @@ def main_loop():
             print("\nEnter the day you need the room for (M, T, W, Th, F, or Sat):")
             day = get_valid_day()
             print(f"\nChecking rooms available at {value_to_time(time_val)} on {day}...\n")
-            free_times(rooms, room_prefix, day, time_val)
+            free_times(index, room_prefix, day, time_val)
             
 
         elif choice == "3":
@@ -373,16 +957,67 @@ def main_loop():
                 print("FAILED DAY")
             else:
                 print(f"\nShowing full availability for {room_prefix or 'all rooms'} on {day}...\n")
-                free_times(rooms, room_prefix, day)
+                free_times(index, room_prefix, day)
+
+        elif choice == "4":
+            print("\nPreferred building (optional, e.g. THH):")
+            preferred = input("> ").strip().upper() or None
+            current_time_value = get_current_time_value()
+            current_day = get_current_day()
+            print(f"\nBest rooms at {value_to_time(current_time_value)} today ({current_day})...\n")
+            print_best_rooms(index, room_prefix, current_day, current_time_value, preferred=preferred)
 
         input("\nPress Enter to search again or Ctrl+C to exit...")
 
-def parse_time_string(time_str):
-    if time_to_value(time_str) == None:
+def parse_time_string(time_str, precise=False):
+    """Converts a --at argument to a time value (minutes if precise), treating 'now' as the current time."""
+    if time_str.strip().lower() == "now":
+        return get_current_minute() if precise else get_current_time_value()
+    time_val = time_to_minutes(time_str) if precise else time_to_value(time_str)
+    if time_val == None:
         raise ValueError(f"Invalid time format: {time_str}")
-
-def parse_args():
-    parser = argparse.ArgumentParser(description="ECF - Empty Classroom Finder")
+    return time_val
+
+def parse_days_string(days_str):
+    """Converts a --days argument (e.g. MWF, M/W/F, tue,thu) to a list of DAYS in the given order."""
+    days = []
+    for token in re.findall(r"th|sat|m|t|w|f", days_str.lower()):
+        day = token.capitalize() if len(token) > 1 else token.upper()
+        if day not in days:
+            days.append(day)
+    if not days:
+        raise ValueError(f"Invalid days: {days_str}")
+    return days
+
+def parse_window_string(window_str):
+    """Converts a --between argument (e.g. 2pm-4pm, 2-4pm, 9:30am-11am) to a (start, end) slot range."""
+    parts = window_str.split("-")
+    if len(parts) != 2:
+        raise ValueError(f"Invalid time window: {window_str}")
+    start_str, end_str = (part.strip().lower() for part in parts)
+    if not start_str.endswith(("am", "pm")):
+        start_str += end_str[-2:]  # "2-4pm" means 2pm to 4pm
+    start, end = time_to_value(start_str), time_to_value(end_str)
+    if start is None or end is None or end <= start:
+        raise ValueError(f"Invalid time window: {window_str}")
+    return start, end
+
+def parse_day_string(day_str):
+    """Converts a --day argument (e.g. mon, Th, sat) to one of DAYS."""
+    day = clean_day(day_str)
+    if day not in DAYS:
+        raise ValueError(f"Invalid day: {day_str}")
+    return day
+
+class BatchQueryParser(argparse.ArgumentParser):
+    """Query parser for batch lines: reports bad lines as ValueError instead of exiting."""
+
+    def error(self, message):
+        raise ValueError(message)
+
+def build_query_parser(parser_class=argparse.ArgumentParser, **kwargs):
+    """Builds the parser for one query (location, time and day); shared by the CLI and batch mode."""
+    parser = parser_class(description="ECF - Empty Classroom Finder", **kwargs)
 
     parser.add_argument("query", nargs="?", default=None,
                         help="Building, floor, or full room name (e.g., THT, THT1, THT123)")
@@ -393,20 +1028,137 @@ def parse_args():
     group.add_argument("--full", action="store_true",
                        help="Show full-day availability")
 
-    parser.add_argument("--day", type=str.lower, choices=DAYS,
+    parser.add_argument("--day", type=str,
                         help="Day of the week (e.g., mon, tue, wed)")
 
+    return parser
+
+def run_recurring_query(args):
+    """Answers a --days query: rooms free in the same window on every given day."""
+    try:
+        days = parse_days_string(args.days)
+        start, end = parse_window_string(args.between) if args.between else (time_to_value(EARLIEST_START), SLOTS_PER_DAY)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    min_length = None if args.min_length is None else -(-args.min_length // 10)  # Minutes to slots, rounded up
+
+    print("\n📋 Parsed Request:")
+    print(f"  Location Filter : {args.query or 'ALL'}")
+    print(f"  Mode            : Recurring ({', '.join(days)})")
+    print(f"  Window          : {value_to_time(start)} to {value_to_time(min(end, SLOTS_PER_DAY - 1))}")
+    if args.min_length is not None:
+        print(f"  Minimum Length  : {args.min_length} minutes")
+    print()
+
+    index, _ = load_index(args.query or "", term=args.term)
+    if not index.prefix_count((args.query or "").upper()):
+        print(f"No rooms found matching '{args.query}'.")
+        return
+    print_free_windows(rooms_free_recurring(index, args.query or "", days, start, end, min_length))
+
+def parse_args():
+    parser = build_query_parser()
+
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Answer many queries (one per line, JSON or CLI-style) from FILE or '-' for stdin, as NDJSON")
+
+    parser.add_argument("--store", metavar="DB",
+                        help="Answer from a SQLite schedule store instead of building the in-memory index")
+    parser.add_argument("--build-store", metavar="DB",
+                        help="(Re)build a SQLite schedule store from courses.json and buildings.json, then exit")
+
+    parser.add_argument("--serve", action="store_true",
+                        help="Keep the index loaded and answer queries over a local HTTP/JSON API")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"Port of the query server (default: {DEFAULT_PORT})")
+    parser.add_argument("--local", action="store_true",
+                        help="Always build/load the index in this process, even if a query server is running")
+    parser.add_argument("--top", type=int, metavar="K",
+                        help="Only show the K rooms that stay free longest (with --at or right now)")
+    parser.add_argument("--prefer", metavar="BUILDING",
+                        help=f"With --top, rank rooms in this building higher (their free time counts {PREFERRED_BUILDING_WEIGHT}x)")
+    parser.add_argument("--days", metavar="DAYS",
+                        help="Find rooms free on all of these days (e.g. MWF, tue,thu), for a recurring meeting")
+    parser.add_argument("--between", metavar="WINDOW",
+                        help="Time window for --days (e.g. 2pm-4pm; default: 9am to midnight)")
+    parser.add_argument("--min-length", type=int, metavar="MINUTES",
+                        help="With --days, also accept free stretches of at least this many minutes inside the window (default: the whole window)")
+    parser.add_argument("--term", metavar="NAME",
+                        help="Answer for another term, read from courses_NAME.json (default: courses.json)")
+    parser.add_argument("--precise", action="store_true",
+                        help="Answer at minute precision (e.g. free until 3:05 PM) instead of 10-minute slots; always answered locally")
+
+    parser.add_argument("--profile", metavar="REPORT",
+                        help=f"Write per-phase timings, memory and counters to REPORT as JSON (or set {profiling.PROFILE_ENV})")
+    parser.add_argument("--cprofile", metavar="FILE",
+                        help=f"Also dump cProfile stats to FILE for pstats/snakeviz (or set {profiling.CPROFILE_ENV})")
+
     return parser.parse_args()
 
+def query_room_counter(args):
+    """Returns room_count(prefix) from whichever backend will answer the one-shot query in args."""
+    if args.store:
+        if not os.path.exists(args.store):
+            return lambda prefix: 0  # Reported when the query runs
+        store = ScheduleStore(args.store)
+        return lambda prefix: len(store.rooms_with_prefix(prefix))
+    if args.precise:
+        return local_room_counter(lambda prefix: load_index(prefix, precise=True, term=args.term)[0])
+    if not (args.local or args.days or (args.top and not args.full)) and server_serves(args.port, args.term):
+        counter = server_room_counter(args.query, args.port)
+        if counter is not None:
+            return counter
+    return local_room_counter(lambda prefix: load_index(prefix, term=args.term)[0])
+
 def main():
     raw_args = sys.argv[1:]
     if not raw_args:
+        profiling.start_from_env()  # The interactive loop has no flags; the report is written on exit
         main_loop()
         return
     
     args = parse_args()
+    if args.profile or args.cprofile:
+        profiling.start(args.profile, args.cprofile)
+    else:
+        profiling.start_from_env()
+
+    if args.build_store:
+        build_store(args.build_store)
+        print(f"Saved schedule store to {args.build_store}")
+        return
+
+    if args.batch:
+        index, _ = load_index(term=args.term)
+        if args.batch == "-":
+            run_batch(index, sys.stdin, sys.stdout)
+        else:
+            with open(args.batch, 'r', encoding='utf-8') as file:
+                run_batch(index, file, sys.stdout)
+        return
+
+    if args.serve:
+        index, sorted_buildings = load_index(term=args.term)
+        serve(api_handler(index, sorted_buildings, load_building_search(), args.term), port=args.port)
+        return
+
+    if args.query:
+        matches = resolve_building_name(args.query, load_building_search(), query_room_counter(args))
+        if matches:
+            code, name, _ = matches[0]
+            print(f"Showing {name} ({code}) for '{args.query}'")
+            args.query = code
+
+    if args.days:
+        run_recurring_query(args)
+        return
     
-    day = args.day or datetime.now().strftime("%a").lower()[:3]
+    try:
+        day = parse_day_string(args.day) if args.day else get_current_day()
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
 
     # Determine the mode
     if args.full:
@@ -414,23 +1166,51 @@ def main():
         time = None
     elif args.at:
         try:
-            time = parse_time_string(args.at)
+            time = parse_time_string(args.at, args.precise)
             mode = "time"
         except ValueError as e:
             print(f"❌ {e}")
             sys.exit(1)
     else:
         mode = "time"
-        time = datetime.now().time()
+        time = get_current_minute() if args.precise else get_current_time_value()
 
     # Output summary
     print("\n📋 Parsed Request:")
     print(f"  Location Filter : {args.query or 'ALL'}")
     print(f"  Mode            : {'Full-Day View' if mode == 'full' else 'Check Specific Time'}")
-    print(f"  Day             : {day.capitalize()}")
-    if time:
-        print(f"  Time            : {time.strftime('%I:%M %p')}")
+    print(f"  Day             : {day or 'None (no classes today)'}")
+    if time is not None:
+        print(f"  Time            : {minutes_to_time(time) if args.precise else value_to_time(time)}")
     print()
+
+    if not day:
+        return
+
+    if args.precise:
+        schedule, _ = load_index(args.query or "", precise=True, term=args.term)
+        precise_free_times(schedule, args.query or "", day, time)
+        return
+
+    if args.store:
+        if not os.path.exists(args.store):
+            print(f"❌ Schedule store not found: {args.store}")
+            sys.exit(1)
+        store = ScheduleStore(args.store)
+        store_free_times(store, args.query or "", day, time)
+        store.close()
+        return
+
+    if args.top and time is not None:
+        index, _ = load_index(args.query or "", term=args.term)
+        print_best_rooms(index, args.query or "", day, time, args.top, args.prefer)
+        return
+
+    if not args.local and print_server_answer(args.query or "", day, time, args.port, args.term):
+        return
+
+    index, _ = load_index(args.query or "", term=args.term)
+    free_times(index, args.query or "", day, time)
     
 
 if __name__ == "__main__":
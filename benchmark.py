@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import app
+from htmlScraper import PARSERS
+
+DAY_PATTERNS = ["Mon, Wed", "Tue, Thu", "Mon, Wed, Fri", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat",
+                "Mon, Tue, Wed, Thu, Fri"]
+DURATIONS = [50, 80, 110, 170]  # Minutes
+TYPES = ["Lecture", "Discussion", "Lab", "Quiz"]
+HTML_SECTIONS_PER_PAGE = 100
+
+
+# === SYNTHETIC CAMPUS ===
+
+def format_clock(minutes):
+    """Formats minutes after midnight the way webreg does, e.g. 02:30pm."""
+    hour, minute = divmod(minutes, 60)
+    period = "pm" if hour >= 12 else "am"
+    return f"{hour % 12 or 12:02}:{minute:02}{period}"
+
+def generate_campus(sections=20000, rooms=1000, seed=1):
+    """
+    Returns (courses, buildings) shaped like courses.json and buildings.json.
+
+    Everything comes from one seeded generator, so a given (sections, rooms, seed) always
+    produces the same campus and runs on different commits are comparable.
+    """
+    rng = random.Random(seed)
+
+    building_count = max(1, rooms // 25)
+    codes = set()
+    while len(codes) < building_count:
+        codes.add("".join(rng.choice(string.ascii_uppercase) for _ in range(rng.choice([3, 3, 3, 4]))))
+    buildings = [{"name": f"{code.title()} Hall of Synthetic Studies", "code": code} for code in sorted(codes)]
+
+    codes = sorted(codes)
+    room_names = set()
+    while len(room_names) < rooms:
+        room_names.add(f"{rng.choice(codes)}{rng.randint(1, 4)}{rng.randint(0, 2)}{rng.randint(0, 9)}")
+    room_names = sorted(room_names)
+
+    courses = []
+    for section_id in range(sections):
+        times = []
+        locations = []
+        for _ in range(1 if rng.random() < 0.9 else 2):
+            start = rng.randint(7, 20) * 60 + rng.choice([0, 10, 30, 50])
+            end = min(start + rng.choice(DURATIONS), 23 * 60 + 50)
+            times.append(f"{format_clock(start)}-{format_clock(end)}")
+            locations.append(rng.choice(room_names))
+
+        department = f"DEPT{section_id % 400:03}"
+        courses.append({
+            "course_id": f"{department}-{100 + section_id % 97}",
+            "course_name": f"Synthetic Course {section_id % 97}",
+            "description": " ".join(["Lorem ipsum dolor sit amet."] * rng.randint(2, 12)),
+            "section": str(10000 + section_id),
+            "type": rng.choice(TYPES),
+            "units": str(rng.choice([2, 4])),
+            "registered": f"{rng.randint(0, 40)} of 40",
+            "time": ", ".join(times),
+            "days": rng.choice(DAY_PATTERNS),
+            "instructor": "Staff",
+            "location": "TBA" if rng.random() < 0.05 else ", ".join(locations),
+        })
+
+    return courses, buildings
+
+def render_webreg_html(sections):
+    """Renders sections as webreg course listing pages, HTML_SECTIONS_PER_PAGE sections to a page."""
+    pages = []
+    for page_start in range(0, len(sections), HTML_SECTIONS_PER_PAGE):
+        page_sections = sections[page_start:page_start + HTML_SECTIONS_PER_PAGE]
+        parts = ["<html><body><div class=\"container\"><h1>Schedule of Classes</h1>"]
+
+        courses = {}
+        for section in page_sections:
+            courses.setdefault(section["course_id"], []).append(section)
+
+        for course_id, course_sections in courses.items():
+            first = course_sections[0]
+            parts.append(
+                f"<div class=\"course-header\"><a class=\"course-title-indent\" href=\"#\">"
+                f"<span class=\"crsID\">{course_id}:</span> <span class=\"crsTitl\">{first['course_name']}</span>"
+                f"</a></div>"
+                f"<div class=\"accordion-content-area\"><div class=\"bs-callout\">{first['description']}</div>")
+            for section in course_sections:
+                parts.append(
+                    f"<div class=\"section-row\"><b>{section['section']}</b>"
+                    f"<span class=\"course-section-lecture\">Type: {section['type']}</span>"
+                    f"<span class=\"section_row\"></span><span class=\"section_row\"></span><span class=\"section_row\"></span>"
+                    f"<span class=\"section_row\">Units: {section['units']}</span>"
+                    f"<span class=\"section_row\">Registered: {section['registered']}</span>"
+                    f"<span class=\"section_row\">Time: {section['time']}</span>"
+                    f"<span class=\"section_row\">Days: {section['days']}</span>"
+                    f"<span class=\"section_row\">Instructor: {section['instructor']}</span>"
+                    f"<span class=\"section_row\">Location: {section['location']}</span>"
+                    f"</div>")
+            parts.append("</div>")
+
+        parts.append("</div></body></html>")
+        pages.append("".join(parts))
+    return pages
+
+def write_campus(directory, courses, buildings):
+    with open(os.path.join(directory, app.COURSES_FILE), 'w', encoding='utf-8') as file:
+        json.dump(courses, file, indent=4)
+    with open(os.path.join(directory, app.BUILDINGS_FILE), 'w', encoding='utf-8') as file:
+        json.dump(buildings, file, indent=4)
+
+
+# === MEASUREMENT ===
+
+def measure(function, operations, repeat=3):
+    """
+    Times function() repeat times, then runs it once more under tracemalloc for its peak memory.
+
+    operations is how many units of work one call does (sections, queries, pages...), so
+    results at different scales can be compared as throughput.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "operations": operations,
+        "best_seconds": best,
+        "mean_seconds": sum(timings) / len(timings),
+        "operations_per_second": operations / best if best else None,
+        "peak_memory_kib": peak // 1024,
+    }
+
+def quiet(function, *args):
+    """Runs a printing function with its output discarded, so the terminal isn't part of the timing."""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return function(*args)
+    return run
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+# === BENCHMARKS ===
+
+def run_benchmarks(sections, rooms, seed, repeat, html_sections, only=None):
+    """Generates a campus in a scratch directory and returns {benchmark name: measurement}."""
+    courses, buildings = generate_campus(sections, rooms, seed)
+    pages = render_webreg_html(courses[:html_sections])
+    results = {}
+
+    def selected(name):
+        return not only or any(name.startswith(prefix) for prefix in only)
+
+    original_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        write_campus(directory, courses, buildings)
+        del courses  # Only the files on disk are read from here on
+        os.chdir(directory)
+        try:
+            index, sorted_buildings = quiet(app.process_raw_data)()
+            if selected("process_raw_data"):
+                results["process_raw_data"] = measure(quiet(app.process_raw_data), sections, repeat)
+
+            # One query per (building, day), plus the whole campus at once
+            prefixes = [building["code"] for building in buildings]
+            queries = [(prefix, day) for prefix in prefixes for day in app.DAYS]
+            noon = app.time_to_value("12:00pm")
+
+            def free_times_each(specific_time):
+                def run():
+                    for prefix, day in queries:
+                        app.free_times(index, prefix, day, specific_time)
+                return run
+
+            if selected("free_times_at"):
+                results["free_times_at"] = measure(quiet(free_times_each(noon)), len(queries), repeat)
+            if selected("free_times_windows"):
+                results["free_times_windows"] = measure(quiet(free_times_each(None)), len(queries), repeat)
+            if selected("free_times_campus"):
+                results["free_times_campus_at"] = measure(quiet(app.free_times, index, "", "W", noon), 1, repeat)
+                results["free_times_campus_windows"] = measure(quiet(app.free_times, index, "", "W"), 1, repeat)
+
+            if selected("find_negative_sequences"):
+                room_days = [index.slots(room, day) for room in index.rooms for day in app.DAYS]
+
+                def scan_room_days():
+                    for slots in room_days:
+                        app.find_negative_sequences(slots)
+                results["find_negative_sequences"] = measure(scan_room_days, len(room_days), repeat)
+
+            if selected("print_buildings_table"):
+                results["print_buildings_table"] = measure(quiet(app.print_buildings_table, sorted_buildings),
+                                                           len(sorted_buildings), repeat)
+        finally:
+            os.chdir(original_directory)
+
+    for name, parse in PARSERS.items():
+        benchmark = f"parse_course_html_{name}"
+        if selected(benchmark):
+            def parse_pages(parse=parse):
+                for html in pages:
+                    parse(html)
+            results[benchmark] = measure(parse_pages, html_sections, repeat)
+
+    return results
+
+def compare_results(baseline, current):
+    """Prints each benchmark's speedup over a previous results file (>1 means faster now)."""
+    print(f"{'benchmark':<30} {'before':>10} {'after':>10} {'speedup':>8}", file=sys.stderr)
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+        speedup = before["best_seconds"] / result["best_seconds"] if result["best_seconds"] else float("inf")
+        print(f"{name:<30} {before['best_seconds']:>9.4f}s {result['best_seconds']:>9.4f}s {speedup:>7.2f}x",
+              file=sys.stderr)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, queries and parsing on a synthetic campus")
+
+    parser.add_argument("--sections", type=int, default=20000,
+                        help="Number of course sections to generate (default: 20000)")
+    parser.add_argument("--rooms", type=int, default=1000,
+                        help="Number of distinct rooms to generate (default: 1000)")
+    parser.add_argument("--seed", type=int, default=1,
+                        help="Seed for the campus generator (default: 1)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timed runs per benchmark; the best is reported (default: 3)")
+    parser.add_argument("--html-sections", type=int, default=2000,
+                        help="Sections rendered as webreg HTML for the parser benchmarks (default: 2000)")
+    parser.add_argument("--only", nargs="+", metavar="NAME",
+                        help="Run only the benchmarks whose names start with one of these")
+    parser.add_argument("--output", help="Write the JSON results here instead of to stdout")
+    parser.add_argument("--compare", metavar="RESULTS",
+                        help="A previous results file to compare against")
+
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    results = run_benchmarks(args.sections, args.rooms, args.seed, args.repeat,
+                             min(args.html_sections, args.sections), args.only)
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "parameters": {"sections": args.sections, "rooms": args.rooms, "seed": args.seed,
+                       "repeat": args.repeat, "html_sections": min(args.html_sections, args.sections)},
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            compare_results(json.load(file), report)
+
+
+if __name__ == "__main__":
+    main()
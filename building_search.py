@@ -0,0 +1,86 @@
+import re
+from collections import defaultdict
+
+MIN_SIMILARITY = 0.3  # Weakest word-to-word trigram similarity still counted as a match
+CODE_MATCH_SCORE = 2.0  # A query that is exactly a building code beats any name match
+
+
+def words(text):
+    """Splits text into lowercase alphanumeric words."""
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def trigrams(word):
+    """Returns the set of trigrams of a word, padded so short words and word starts get their own."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class BuildingSearch:
+    """
+    Token and trigram inverted index over building names, for finding codes from what students type.
+
+    Every distinct word of every name is indexed once by its trigrams. A query word is scored
+    against only the words that share a trigram with it (Dice similarity, with a bonus when it
+    is the start of the word), and each building scores the best match of every query word,
+    so a lookup touches a few posting lists instead of comparing against every building.
+    """
+
+    def __init__(self, building_names):
+        self.codes = sorted(building_names)
+        self.names = [building_names[code] for code in self.codes]
+        self.code_ids = {code.upper(): i for i, code in enumerate(self.codes)}
+
+        self.word_buildings = defaultdict(set)
+        for building_id, name in enumerate(self.names):
+            for word in words(name):
+                self.word_buildings[word].add(building_id)
+
+        self.trigram_words = defaultdict(list)
+        self.word_trigram_counts = {}
+        for word in self.word_buildings:
+            grams = trigrams(word)
+            self.word_trigram_counts[word] = len(grams)
+            for gram in grams:
+                self.trigram_words[gram].append(word)
+
+    def similar_words(self, query_word):
+        """Returns {indexed word: similarity} for the words sharing enough trigrams with query_word."""
+        grams = trigrams(query_word)
+        shared = defaultdict(int)
+        for gram in grams:
+            for word in self.trigram_words.get(gram, ()):
+                shared[word] += 1
+
+        similar = {}
+        for word, count in shared.items():
+            similarity = 2 * count / (len(grams) + self.word_trigram_counts[word])
+            if word.startswith(query_word):
+                similarity = max(similarity, 0.9)  # Still typing: "salv" should find "salvatori"
+            if similarity >= MIN_SIMILARITY:
+                similar[word] = similarity
+        return similar
+
+    def search(self, text, limit=5):
+        """Returns up to limit (code, name, score) matches for free text, best first."""
+        query_words = words(text)
+        if not query_words:
+            return []
+
+        scores = defaultdict(float)
+        for query_word in query_words:
+            best = {}
+            for word, similarity in self.similar_words(query_word).items():
+                for building_id in self.word_buildings[word]:
+                    if similarity > best.get(building_id, 0):
+                        best[building_id] = similarity
+            for building_id, similarity in best.items():
+                scores[building_id] += similarity / len(query_words)
+
+        code_id = self.code_ids.get(text.strip().upper())
+        if code_id is not None:
+            scores[code_id] += CODE_MATCH_SCORE
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.codes[item[0]]))
+        return [(self.codes[building_id], self.names[building_id], round(score, 3))
+                for building_id, score in ranked[:limit]]
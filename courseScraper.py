@@ -1,4 +1,11 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from responseCache import ResponseCache
 
 def load_cookies_from_file(file_path):
     """
@@ -25,35 +32,114 @@ def load_cookies_from_file(file_path):
 
     return cookies
 
-def getCourseHTML(code):
+WEBREG_URL = "https://webreg.usc.edu"
+
+def course_page_url(code, page_number=1, base_url=WEBREG_URL):
+    """Builds the URL of one page of a department's course listing."""
+    url = base_url + "/Courses?Program=" + code
+    if page_number > 1:
+        url += "&page=" + str(page_number)
+    return url
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Mobile Safari/537.36",
+    "Referer": "https://webreg.usc.edu/Departments",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+    "Accept-Encoding": "gzip, deflate, br, zstd",
+    "Accept-Language": "en-US,en;q=0.9,fr;q=0.8",
+    "Upgrade-Insecure-Requests": "1"
+}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+GONE_STATUSES = {404, 410}  # The page does not exist, e.g. past the last page or a retired program
+MISSING_PAGE = ""  # What get returns for those, as opposed to None for a page that failed
+
+class CourseFetcher:
+    """
+    Fetches pages over one pooled keep-alive session.
+
+    Cookies are loaded once, and transient failures (connection errors, timeouts, 5xx and
+    429 responses) are retried with jittered exponential backoff, honouring Retry-After.
+    With a ResponseCache, cached pages are revalidated with conditional requests and a
+    304 answer is served from the cache.
+    """
+
+    def __init__(self, cookie_file="cookies.txt", max_retries=4, backoff=1.0, max_backoff=60.0, timeout=30, pool_size=8, cache=None):
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        self.session.cookies.update(load_cookies_from_file(cookie_file))
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def retry_delay(self, attempt, response=None):
+        """Returns how long to wait before retry number attempt+1."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(self.max_backoff, max(0.0, float(retry_after)))
+            except ValueError:
+                try:
+                    when = parsedate_to_datetime(retry_after)
+                    return min(self.max_backoff, max(0.0, when.timestamp() - time.time()))
+                except (TypeError, ValueError):
+                    pass
+
+        # "Full jitter": wait a random time up to the exponential backoff cap
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def get(self, url):
+        """Returns the page text, MISSING_PAGE if the server says it does not exist, or None once the page failed for good."""
+        cached_text, validators = self.cache.load(url) if self.cache else (None, {})
+        headers = ResponseCache.conditional_headers(validators) if cached_text is not None else {}
+
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+            else:
+                if response.status_code == 304 and cached_text is not None:
+                    return cached_text
+                if response.status_code == 200:
+                    if self.cache:
+                        self.cache.store(url, response.text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                    return response.text
+                if response.status_code in GONE_STATUSES:
+                    if self.cache:
+                        self.cache.store(url, MISSING_PAGE)  # So offline runs end the listing in the same place
+                    return MISSING_PAGE
+                error = f"Status code: {response.status_code}"
+                if response.status_code not in RETRY_STATUSES:
+                    break
+
+            if attempt < self.max_retries:
+                delay = self.retry_delay(attempt, response)
+                print(f"Retrying {url} in {delay:.1f} seconds ({error})")
+                time.sleep(delay)
+
+        print(f"Failed to fetch page. {error}")
+        return None
+
+    def close(self):
+        self.session.close()
+
+_default_fetcher = None
+
+def fetch_html(url):
+    """Fetches a page with a shared CourseFetcher, created on first use."""
+    global _default_fetcher
+    if _default_fetcher is None:
+        _default_fetcher = CourseFetcher()
+    return _default_fetcher.get(url)
+
+def getCourseHTML(code, page_number=1):
     # URL for the courses page
-    url = "https://webreg.usc.edu/Courses?Program="+code
-
-    # Create a session
-    session = requests.Session()
-
-    # Define headers
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Mobile Safari/537.36",
-        "Referer": "https://webreg.usc.edu/Departments",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-        "Accept-Encoding": "gzip, deflate, br, zstd",
-        "Accept-Language": "en-US,en;q=0.9,fr;q=0.8",
-        "Upgrade-Insecure-Requests": "1"
-    }
-
-    # Define cookies
-    cookies = load_cookies_from_file("cookies.txt")
-
-    # Fetch the page
-    response = session.get(url, headers=headers, cookies=cookies)
-
-    # Save the response content as an HTML file
-    if response.status_code == 200:
-        return response.text
-        with open("webreg_courses.html", "w", encoding="utf-8") as file:
-            file.write(response.text)
-        print("Saved as webreg_courses.html")
-    else:
-        print(f"Failed to fetch page. Status code: {response.status_code}")
-        return None
\ No newline at end of file
+    return fetch_html(course_page_url(code, page_number))
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import threading
+
+from snapshot import file_fingerprint
+
+SHARD_DIR = "courses"
+MANIFEST_FILE = "manifest.json"
+CHECKPOINT_FILE = "checkpoint.json"
+ASSEMBLED_FILE = "assembled.json"  # Which manifest the current courses.json was assembled from
+
+
+def shard_path(code, shard_dir=SHARD_DIR):
+    return os.path.join(shard_dir, f"{code}.json")
+
+
+def manifest_path(shard_dir=SHARD_DIR):
+    return os.path.join(shard_dir, MANIFEST_FILE)
+
+
+def checkpoint_path(shard_dir=SHARD_DIR):
+    return os.path.join(shard_dir, CHECKPOINT_FILE)
+
+
+def assembled_path(shard_dir=SHARD_DIR):
+    return os.path.join(shard_dir, ASSEMBLED_FILE)
+
+
+def content_hash(parts):
+    """Returns a stable hash of a sequence of strings (e.g. the HTML pages of a department)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def write_atomic(path, text):
+    """Writes text to path through a temporary file, so readers never see a partial file."""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        file.write(text)
+    os.replace(temp_path, path)
+
+
+def load_manifest(shard_dir=SHARD_DIR):
+    """Returns {code: {"html_hash": ..., "sections_hash": ..., "parser": ...}}, or {} when there are no shards."""
+    try:
+        with open(manifest_path(shard_dir), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, shard_dir=SHARD_DIR):
+    os.makedirs(shard_dir, exist_ok=True)
+    write_atomic(manifest_path(shard_dir), json.dumps(manifest, indent=4, sort_keys=True))
+
+
+def write_shard(code, sections, shard_dir=SHARD_DIR):
+    """Writes one department's sections and returns the hash of what was written."""
+    os.makedirs(shard_dir, exist_ok=True)
+    text = json.dumps(sections, indent=4, ensure_ascii=False)
+    write_atomic(shard_path(code, shard_dir), text)
+    return content_hash([text])
+
+
+def load_shard(code, shard_dir=SHARD_DIR):
+    with open(shard_path(code, shard_dir), 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def assemble_courses_json(codes, output_file, shard_dir=SHARD_DIR):
+    """Concatenates the department shards, in codes order, into one courses.json array."""
+    temp_file = output_file + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8') as out:
+        out.write("[")
+        first = True
+        for code in codes:
+            if not os.path.exists(shard_path(code, shard_dir)):
+                continue
+            for section in load_shard(code, shard_dir):
+                out.write("\n    " if first else ",\n    ")
+                out.write(json.dumps(section, ensure_ascii=False))
+                first = False
+        out.write("\n]")
+    os.replace(temp_file, output_file)
+    write_atomic(assembled_path(shard_dir), json.dumps({
+        "manifest_hash": manifest_hash(shard_dir),
+        "output": list(file_fingerprint(output_file)),
+    }))
+
+
+def manifest_hash(shard_dir=SHARD_DIR):
+    """Returns the hash of the manifest file as it is on disk ("" if there is none)."""
+    try:
+        with open(manifest_path(shard_dir), 'r', encoding='utf-8') as file:
+            return content_hash([file.read()])
+    except OSError:
+        return ""
+
+
+def shards_match(courses_file, shard_dir=SHARD_DIR):
+    """
+    Returns True if courses_file was assembled from exactly the shards the manifest lists now.
+
+    The manifest is saved after every shard, so an interrupted scrape leaves it ahead of
+    courses.json; the shards only stand in for courses.json once a scrape has finished.
+    """
+    try:
+        with open(assembled_path(shard_dir), 'r', encoding='utf-8') as file:
+            assembled = json.load(file)
+        return (assembled["manifest_hash"] == manifest_hash(shard_dir)
+                and tuple(assembled["output"]) == file_fingerprint(courses_file))
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+
+class ScrapeCheckpoint:
+    """
+    The departments an unfinished scrape has already completed, saved after each one.
+
+    A department is done once its shard and manifest entry are on disk (or it was found
+    unchanged or empty), so a resumed scrape can skip it. Departments finish on several
+    threads, so every update rewrites the file under a lock.
+    """
+
+    def __init__(self, shard_dir=SHARD_DIR, resume=False):
+        self.shard_dir = shard_dir
+        self.lock = threading.Lock()
+        self.done = set()
+        if resume:
+            try:
+                with open(checkpoint_path(shard_dir), 'r', encoding='utf-8') as file:
+                    self.done = set(json.load(file)["done"])
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def is_done(self, code):
+        return code in self.done
+
+    def mark_done(self, code):
+        with self.lock:
+            self.done.add(code)
+            os.makedirs(self.shard_dir, exist_ok=True)
+            write_atomic(checkpoint_path(self.shard_dir), json.dumps({"done": sorted(self.done)}))
+
+    def finish(self):
+        """Removes the checkpoint once the whole scrape has completed."""
+        try:
+            os.remove(checkpoint_path(self.shard_dir))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,58 @@
+import json
+
+CHUNK_SIZE = 1 << 16  # Characters read from disk at a time
+WHITESPACE = " \t\r\n"
+
+
+def iter_json_records(file, chunk_size=CHUNK_SIZE):
+    """
+    Yields the objects of a top-level JSON array (or of an NDJSON file) one at a time.
+
+    Only a chunk of the file plus the record being decoded is held in memory, so the
+    size of courses.json no longer dictates peak memory during startup.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    in_array = None
+
+    while True:
+        # Skip whitespace (and the commas between array items) before the next record
+        while True:
+            while pos < len(buffer) and (buffer[pos] in WHITESPACE or (in_array and buffer[pos] == ",")):
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer = file.read(chunk_size)
+            pos = 0
+            eof = not buffer
+
+        if pos >= len(buffer):
+            if in_array:
+                raise ValueError("Unexpected end of file: JSON array was never closed")
+            return
+
+        if in_array is None:
+            in_array = buffer[pos] == "["
+            if in_array:
+                pos += 1
+                continue
+
+        if in_array and buffer[pos] == "]":
+            return
+
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The record continues past the end of the buffer; drop what was consumed and read more
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        yield record
+        pos = end
@@ -2,6 +2,15 @@ import json
 from bs4 import BeautifulSoup
 import re
 
+# The fast parser uses lxml when it is installed and falls back to the built-in parser
+try:
+    import lxml  # noqa: F401
+    FAST_BACKEND = "lxml"
+except ImportError:
+    FAST_BACKEND = "html.parser"
+
+SECTION_FIELDS = ["units", "registered", "time", "days", "instructor", "location"]  # section_row spans 3..8
+
 def clean_text(text):
     """Removes extra spaces, newlines, and leading/trailing characters."""
     return ' '.join(text.strip().split())
@@ -10,6 +19,10 @@ def remove_prefix(text):
     """Removes common prefixes like 'Time:', 'Location:', etc., if they appear at the start of the string."""
     return re.sub(r'^(Time|Location|Instructor|Days|Registered|Units|Type):\s*', '', text, flags=re.IGNORECASE)
 
+def has_sections(html):
+    """Cheap check for whether a page lists any sections, without parsing it."""
+    return "section-row" in html
+
 def parse_course_html(html):
     soup = BeautifulSoup(html, 'html.parser')
 
@@ -54,6 +67,68 @@ def parse_course_html(html):
 
     return sections_list
 
+def parse_course_html_fast(html):
+    """Same output as parse_course_html, but parsed with FAST_BACKEND and each row's spans read once."""
+    # The whole tree is kept: straining out everything but the course divs saved little, and
+    # lifted them out of their parents, pairing headers with accordions that weren't siblings
+    soup = BeautifulSoup(html, FAST_BACKEND)
+
+    sections_list = []
+
+    for course_header in soup.find_all("div", class_="course-header"):
+        course_title_elem = course_header.find("a", class_="course-title-indent")
+        if not course_title_elem:
+            continue
+
+        course_id = clean_text(course_title_elem.find("span", class_="crsID").text.replace(":", ""))
+        course_name = clean_text(course_title_elem.find("span", class_="crsTitl").text)
+
+        course_details_div = course_header.find_next_sibling("div", class_="accordion-content-area")
+        course_description = ""
+        section_rows = []
+        if course_details_div:
+            description_elem = course_details_div.find("div", class_="bs-callout")
+            if description_elem:
+                course_description = clean_text(description_elem.text)
+            section_rows = course_details_div.find_all("div", class_="section-row")
+
+        for section in section_rows:
+            section_number = section.find("b")
+            section_type = section.find("span", class_="course-section-lecture")
+            spans = section.find_all("span", class_="section_row")
+
+            section_data = {
+                "course_id": course_id,
+                "course_name": course_name,
+                "description": course_description,
+                "section": clean_text(section_number.text) if section_number else "",
+                "type": remove_prefix(clean_text(section_type.text)) if section_type else "",
+            }
+            for position, field in enumerate(SECTION_FIELDS, start=3):
+                section_data[field] = remove_prefix(clean_text(spans[position].text)) if len(spans) > position else ""
+
+            sections_list.append(section_data)
+
+    return sections_list
+
+def compare_parsers(html):
+    """Runs both parsers on a page and returns a list of human-readable differences (empty if identical)."""
+    classic = parse_course_html(html)
+    fast = parse_course_html_fast(html)
+
+    differences = []
+    if len(classic) != len(fast):
+        differences.append(f"section count: classic={len(classic)} fast={len(fast)}")
+    for i, (a, b) in enumerate(zip(classic, fast)):
+        if json.dumps(a, ensure_ascii=False) != json.dumps(b, ensure_ascii=False):
+            differences.append(f"section {i}: classic={a} fast={b}")
+    return differences
+
+PARSERS = {
+    "classic": parse_course_html,
+    "fast": parse_course_html_fast,
+}
+
 def save_to_json(data, output_file):
     with open(output_file, 'w', encoding='utf-8') as file:
         json.dump(data, file, indent=4, ensure_ascii=False)
@@ -0,0 +1,109 @@
+import re
+
+import profiling
+
+LOCATION_PATTERN = re.compile(r"([A-Za-z]+)(\d+[A-Za-z]?)")  # A building code followed by a room number
+TIME_RANGE_PATTERN = re.compile(r"(\d{2}:\d{2}(?:am|pm))-(\d{2}:\d{2}(?:am|pm))")
+DAY_PATTERN = re.compile(r"Th|M|T|W|F|Sat")
+END = ""  # Trie key marking that the path so far spells a whole code
+
+
+class CodeTrie:
+    """Building codes stored one letter per level, so all codes starting a word are found in a single walk."""
+
+    def __init__(self, codes):
+        self.root = {}
+        for code in codes:
+            node = self.root
+            for char in code:
+                node = node.setdefault(char, {})
+            node[END] = code
+
+    def prefix_lengths(self, word):
+        """Returns the lengths of every code that word starts with, shortest first."""
+        lengths = []
+        node = self.root
+        for i, char in enumerate(word):
+            if END in node:
+                lengths.append(i)
+            node = node.get(char)
+            if node is None:
+                return lengths
+        if END in node:
+            lengths.append(len(word))
+        return lengths
+
+
+class LocationResolver:
+    """
+    Turns the location, time and days strings of sections into rooms, building codes and times.
+
+    The same few thousand strings repeat across every section of a term, so each distinct one
+    is parsed once and its result kept; ingestion then costs a dict lookup per section. Lookups
+    and misses are counted per cache so profiled runs can report the hit rates.
+
+    Building codes come from a trie over the known codes: a room like "SGMB101" belongs to
+    SGM when the letters are a code plus one of room_endings, tried in order, as before.
+    """
+
+    def __init__(self, building_names, parse_time, room_endings=()):
+        self.building_names = building_names
+        self.parse_time = parse_time
+        self.room_endings = room_endings
+        self.trie = CodeTrie(building_names)
+        self.location_cache = {}
+        self.time_cache = {}
+        self.days_cache = {}
+        self.lookups = {"location": 0, "time": 0, "days": 0}
+
+    def building_code(self, letters):
+        """Returns the building code the letters of a room name refer to, or None if it is not a known building."""
+        code_lengths = self.trie.prefix_lengths(letters)
+        for ending in self.room_endings:
+            if letters.endswith(ending) and len(letters) - len(ending) in code_lengths:
+                return letters[:-len(ending)]
+        return letters if code_lengths and code_lengths[-1] == len(letters) else None
+
+    def locations(self, location_string):
+        """Returns (location, ROOM, building code or None) for every room named in a location string."""
+        self.lookups["location"] += 1
+        resolved = self.location_cache.get(location_string)
+        if resolved is None:
+            resolved = self.location_cache[location_string] = tuple(
+                (match.group(0), match.group(0).upper(), self.building_code(match.group(1)))
+                for match in LOCATION_PATTERN.finditer(location_string)
+            )
+        return resolved
+
+    def time_ranges(self, time_string):
+        """Returns the (start, end) of every time range in a time string; unparsable times are None."""
+        self.lookups["time"] += 1
+        ranges = self.time_cache.get(time_string)
+        if ranges is None:
+            ranges = self.time_cache[time_string] = tuple(
+                (self.parse_time(match.group(1)), self.parse_time(match.group(2)))
+                for match in TIME_RANGE_PATTERN.finditer(time_string)
+            )
+        return ranges
+
+    def days(self, days_string):
+        """Returns the distinct days of a days string, in order."""
+        self.lookups["days"] += 1
+        days = self.days_cache.get(days_string)
+        if days is None:
+            days = self.days_cache[days_string] = tuple(dict.fromkeys(DAY_PATTERN.findall(days_string)))
+        return days
+
+    def cache_stats(self):
+        """Returns {cache: (lookups, distinct values)} for the location, time and days caches."""
+        return {
+            "location": (self.lookups["location"], len(self.location_cache)),
+            "time": (self.lookups["time"], len(self.time_cache)),
+            "days": (self.lookups["days"], len(self.days_cache)),
+        }
+
+    def record_stats(self):
+        """Adds each cache's hits and misses to the profile counters."""
+        for name, (lookups, misses) in self.cache_stats().items():
+            profiling.count(f"{name}_cache_hits", lookups - misses)
+            profiling.count(f"{name}_cache_misses", misses)
@@ -0,0 +1,225 @@
+import json
+import mmap
+import os
+import struct
+from bisect import bisect_left
+
+from room_index import RoomNames, SLOTS_PER_DAY, slot_range_mask
+from snapshot import file_fingerprint, open_temp_file
+
+MAPPED_INDEX_FILE = "index.ecfidx"
+MAGIC = b"ECFIDX01"
+MASK_BYTES = (SLOTS_PER_DAY + 7) // 8  # One room-day occupancy mask
+DAY_WIDTH = 4
+COVERAGE_WIDTH = 32
+MAX_INPUTS = 4
+
+# magic, room count, day count, room name width, bytes per slot row, buildings JSON length,
+# coverage, then (size, mtime_ns) of up to MAX_INPUTS input files
+HEADER = struct.Struct(f"<8sIHHII{COVERAGE_WIDTH}s" + "qq" * MAX_INPUTS)
+
+
+def index_file_for(term=None, coverage=""):
+    """Returns the mapped index file of a term ('index.ecfidx' for the default term), or of one room prefix of it."""
+    path = f"index_{term}.ecfidx" if term else MAPPED_INDEX_FILE
+    return path.replace(".ecfidx", f"@{coverage}.ecfidx") if coverage else path
+
+
+def write_mapped_index(path, index, sorted_buildings, input_files):
+    """
+    Writes a RoomIndex in the fixed-width binary layout MappedRoomIndex reads.
+
+    After the header come the day names, the sorted room table (names NUL-padded to the
+    longest one), every room's day masks (MASK_BYTES each, room-major) and every day's
+    slot rows (one bit per room), then the buildings table as JSON. The file is replaced
+    atomically, so processes that already have the old one mapped keep reading it safely.
+    """
+    if len(input_files) > MAX_INPUTS:
+        raise ValueError(f"At most {MAX_INPUTS} input files can be fingerprinted")
+    name_width = max((len(room.encode("utf-8")) for room in index.rooms), default=1)
+    row_bytes = (len(index.rooms) + 7) // 8
+    buildings_json = json.dumps(sorted_buildings).encode("utf-8")
+
+    fingerprints = []
+    for input_file in input_files:
+        fingerprints.extend(file_fingerprint(input_file))
+    fingerprints.extend([0, 0] * (MAX_INPUTS - len(input_files)))
+
+    file, temp_path = open_temp_file(path)  # Private to this writer, so concurrent rebuilds can't clobber it
+    try:
+        with file:
+            file.write(HEADER.pack(MAGIC, len(index.rooms), len(index.days), name_width, row_bytes,
+                                   len(buildings_json), index.coverage.encode("utf-8"), *fingerprints))
+            file.write(b"".join(day.encode("ascii").ljust(DAY_WIDTH, b"\0") for day in index.days))
+            file.write(b"".join(room.encode("utf-8").ljust(name_width, b"\0") for room in index.rooms))
+            file.write(b"".join(mask.to_bytes(MASK_BYTES, "little")
+                                for day_masks in index.room_masks for mask in day_masks))
+            file.write(b"".join(mask.to_bytes(row_bytes, "little")
+                                for day_slots in index.slot_masks for mask in day_slots))
+            file.write(buildings_json)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def load_mapped_index(path, input_files):
+    """Maps the index at path; returns (index, sorted_buildings), or None if it is missing, corrupt or stale."""
+    try:
+        index = MappedRoomIndex(path)
+        fingerprints = [file_fingerprint(input_file) for input_file in input_files]
+    except (OSError, ValueError, struct.error):
+        return None
+    if index.inputs[:len(fingerprints)] != fingerprints:
+        index.close()
+        return None
+    return index, index.buildings()
+
+
+class RoomTable:
+    """
+    Read-only sequence view of the fixed-width room names, so bisect works on the mapping in place.
+
+    Names are decoded the first time they are read and kept, so a long-running process only
+    ever holds the names its queries actually touched.
+    """
+
+    def __init__(self, buffer, offset, count, width):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+        self.width = width
+        self.decoded = [None] * count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.count))]
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        name = self.decoded[i]
+        if name is None:
+            start = self.offset + i * self.width
+            name = self.decoded[i] = self.buffer[start:start + self.width].rstrip(b"\0").decode("utf-8")
+        return name
+
+
+class RoomIds:
+    """Room name to id lookups by binary search over a RoomTable, instead of a dict built at load time."""
+
+    def __init__(self, rooms):
+        self.rooms = rooms
+
+    def __contains__(self, room):
+        i = bisect_left(self.rooms, room)
+        return i < len(self.rooms) and self.rooms[i] == room
+
+    def __getitem__(self, room):
+        i = bisect_left(self.rooms, room)
+        if i < len(self.rooms) and self.rooms[i] == room:
+            return i
+        raise KeyError(room)
+
+
+class MappedRoomIndex(RoomNames):
+    """
+    A RoomIndex read straight from a memory-mapped index file.
+
+    Nothing is decoded up front: rooms, masks and slot rows are read from the mapping when a
+    query touches them, so loading is one mmap call and every process on the host shares the
+    same page-cached copy of each term's file. Free windows are computed from the room-day
+    mask with bit operations rather than from per-room lookup tables.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, room_count, day_count, name_width, self.row_bytes, buildings_length,
+             coverage, *fingerprints) = HEADER.unpack_from(self.buffer)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a mapped index file")
+        except (ValueError, struct.error):
+            self.buffer.close()
+            raise
+
+        self.coverage = coverage.rstrip(b"\0").decode("utf-8")
+        self.inputs = [tuple(fingerprints[i:i + 2]) for i in range(0, len(fingerprints), 2)]
+
+        offset = HEADER.size
+        self.days = [self.buffer[offset + i * DAY_WIDTH:offset + (i + 1) * DAY_WIDTH].rstrip(b"\0").decode("ascii")
+                     for i in range(day_count)]
+        self.day_ids = {day: i for i, day in enumerate(self.days)}
+        self.day_count = day_count
+        offset += day_count * DAY_WIDTH
+
+        self.rooms = RoomTable(self.buffer, offset, room_count, name_width)
+        self.room_ids = RoomIds(self.rooms)
+        offset += room_count * name_width
+
+        self.masks_offset = offset
+        offset += room_count * day_count * MASK_BYTES
+        self.slots_offset = offset
+        offset += day_count * SLOTS_PER_DAY * self.row_bytes
+        self.buildings_offset = offset
+        self.buildings_length = buildings_length
+        if offset + buildings_length != len(self.buffer):
+            self.buffer.close()
+            raise ValueError(f"{path} is truncated")
+
+        self.all_rooms_mask = (1 << room_count) - 1
+
+    def close(self):
+        self.buffer.close()
+
+    def buildings(self):
+        """Returns the (code, name, unique rooms, courses) rows stored with the index."""
+        raw = self.buffer[self.buildings_offset:self.buildings_offset + self.buildings_length]
+        return [tuple(row) for row in json.loads(raw)]
+
+    def _mask(self, room_id, day_id):
+        start = self.masks_offset + (room_id * self.day_count + day_id) * MASK_BYTES
+        return int.from_bytes(self.buffer[start:start + MASK_BYTES], "little")
+
+    def prefix_mask(self, prefix):
+        """Returns the bitmask of rooms whose names start with prefix."""
+        return slot_range_mask(*self.prefix_range(prefix))
+
+    def day_mask(self, room, day):
+        """Returns the occupancy bitmask of room on day."""
+        return self._mask(self.room_ids[room], self.day_ids[day])
+
+    def union_mask(self, room_id, days):
+        """Returns the slots room_id is occupied on any of days, as one mask."""
+        busy = 0
+        for day in days:
+            busy |= self._mask(room_id, self.day_ids[day])
+        return busy
+
+    def slots(self, room, day):
+        """Returns the classic 144-slot list for room on day: -1 when free, 1 when occupied."""
+        mask = self.day_mask(room, day)
+        return [1 if mask >> slot & 1 else -1 for slot in range(SLOTS_PER_DAY)]
+
+    def free_rooms_mask(self, day, slot, candidates=None):
+        """Returns the bitmask of rooms (restricted to candidates) that are free at slot on day."""
+        if candidates is None:
+            candidates = self.all_rooms_mask
+        if not 0 <= slot < SLOTS_PER_DAY:
+            return 0
+        start = self.slots_offset + (self.day_ids[day] * SLOTS_PER_DAY + slot) * self.row_bytes
+        return candidates & ~int.from_bytes(self.buffer[start:start + self.row_bytes], "little")
+
+    def free_window_at(self, room_id, day, slot):
+        """Returns (start, end) of the free run containing slot, or None if busy."""
+        mask = self._mask(room_id, self.day_ids[day])
+        after = mask >> slot
+        if after & 1:
+            return None
+        end = slot + (after & -after).bit_length() - 1 if after else SLOTS_PER_DAY
+        start = (mask & ((1 << slot) - 1)).bit_length()  # One past the last busy slot before slot
+        return start, end
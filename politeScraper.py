@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; every request
+    takes one token, so the long-run request rate never exceeds `rate`.
+    """
+
+    def __init__(self, rate, capacity=1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available, then takes it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class PoliteScraper:
+    """
+    Runs page fetches concurrently while staying polite to the server.
+
+    A global token bucket caps requests per second and a semaphore per host caps how
+    many requests are in flight against the same server at once.
+    """
+
+    def __init__(self, fetch, requests_per_second=2.0, burst=1, max_workers=8, per_host_limit=4):
+        self.fetch = fetch  # Callable taking a URL and returning the page text (or None)
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.host_slots = defaultdict(lambda: threading.BoundedSemaphore(self.per_host_limit))
+        self.host_lock = threading.Lock()
+
+    def _host_slot(self, url):
+        with self.host_lock:
+            return self.host_slots[urlsplit(url).netloc]
+
+    def get(self, url):
+        """Fetches one URL once both the rate limit and the host's concurrency cap allow it."""
+        with self._host_slot(url):
+            self.bucket.acquire()
+            return self.fetch(url)
+
+    def run(self, job, items):
+        """Calls job(self, item) for every item on a thread pool and returns {item: result}."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {item: pool.submit(job, self, item) for item in items}
+            try:
+                return {item: future.result() for item, future in futures.items()}
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)  # Don't start the rest after a failure
+                raise
@@ -0,0 +1,119 @@
+import atexit
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_ENV = "ECF_PROFILE"  # Report path for runs without command-line flags (e.g. the interactive loop)
+CPROFILE_ENV = "ECF_CPROFILE"
+
+
+class Profile:
+    """
+    Wall time, memory and counters per named phase of a run.
+
+    Phases may nest and may run on several threads at once; each one adds its elapsed time
+    and the memory it left allocated (per tracemalloc) to its totals.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phases = {}
+        self.counters = Counter()
+        self.started = time.perf_counter()
+
+    def add(self, name, seconds, allocated=0):
+        with self.lock:
+            phase = self.phases.setdefault(name, {"calls": 0, "seconds": 0.0, "allocated_kib": 0})
+            phase["calls"] += 1
+            phase["seconds"] += seconds
+            phase["allocated_kib"] += allocated // 1024
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def report(self):
+        _, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "wall_seconds": time.perf_counter() - self.started,
+            "peak_memory_kib": peak // 1024,
+            "phases": self.phases,
+            "counters": dict(self.counters),
+        }
+
+
+_profile = None
+
+
+def active():
+    """Returns the running Profile, or None when profiling is off."""
+    return _profile
+
+
+@contextmanager
+def phase(name):
+    """Times the enclosed block as one call of the named phase; does nothing when profiling is off."""
+    if _profile is None:
+        yield
+        return
+    memory_before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _profile.add(name, time.perf_counter() - start, tracemalloc.get_traced_memory()[0] - memory_before)
+
+
+def record(name, seconds):
+    """Adds a phase timed elsewhere (e.g. in a worker process) to the report."""
+    if _profile is not None:
+        _profile.add(name, seconds)
+
+
+def count(name, amount=1):
+    if _profile is not None:
+        _profile.count(name, amount)
+
+
+def start(report_file=None, cprofile_file=None):
+    """
+    Turns profiling on for the rest of the process and writes the results when it exits.
+
+    report_file receives the JSON phase/counter report; cprofile_file, if given, receives a
+    cProfile dump for pstats or snakeviz. Memory is traced with tracemalloc, which slows the
+    run down, so compare profiled timings only with other profiled timings.
+    """
+    global _profile
+    _profile = Profile()
+    tracemalloc.start()
+
+    profiler = None
+    if cprofile_file:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    def finish():
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(cprofile_file)
+        if report_file:
+            with open(report_file, 'w', encoding='utf-8') as file:
+                json.dump(_profile.report(), file, indent=4)
+
+    atexit.register(finish)
+    return _profile
+
+
+def start_from_env(environ=None):
+    """Starts profiling if ECF_PROFILE or ECF_CPROFILE names an output file."""
+    environ = os.environ if environ is None else environ
+    report_file = environ.get(PROFILE_ENV)
+    cprofile_file = environ.get(CPROFILE_ENV)
+    if report_file or cprofile_file:
+        return start(report_file, cprofile_file)
+    return None
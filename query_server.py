@@ -0,0 +1,63 @@
+import json
+import socket
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import URLError
+from urllib.parse import parse_qs, urlencode, urlsplit
+from urllib.request import urlopen
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8642
+CLIENT_TIMEOUT = 0.5  # Seconds the CLI waits for a server before answering locally
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Routes GET requests to server.handle(route, params) and writes its result back as JSON."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            status, payload = self.server.handle(url.path, params)
+        except Exception as e:
+            status, payload = 500, {"error": str(e)}
+
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep the console quiet; the server can answer thousands of queries a minute
+
+
+def serve(handle, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """
+    Answers queries over a local HTTP/JSON API until interrupted.
+
+    handle(route, params) must return (status, payload); it runs on one thread per
+    connection, so it must only read shared state.
+    """
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    server.daemon_threads = True
+    server.handle = handle
+    print(f"Serving on http://{host}:{port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def query_server(route, params, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=CLIENT_TIMEOUT):
+    """Asks a running server; returns its JSON payload, or None if no server answered."""
+    url = f"http://{host}:{port}{route}?{urlencode(params)}"
+    try:
+        with urlopen(url, timeout=timeout) as response:
+            return json.load(response)
+    except (URLError, socket.timeout, ConnectionError, ValueError):
+        return None
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+
+import lz4.frame
+
+CACHE_DIR = "webreg_cache"
+
+
+class ResponseCache:
+    """
+    On-disk cache of fetched pages, keyed by URL.
+
+    Each page is stored lz4-compressed next to a small JSON file holding its URL and
+    the ETag/Last-Modified validators used to revalidate it with a conditional request.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".html.lz4", base + ".json"
+
+    def load(self, url):
+        """Returns (text, validators) for a cached page, or (None, {}) if it isn't cached."""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as file:
+                meta = json.load(file)
+            with open(body_path, 'rb') as file:
+                text = lz4.frame.decompress(file.read()).decode("utf-8")
+        except (OSError, ValueError, RuntimeError):
+            return None, {}
+        return text, meta.get("validators", {})
+
+    def get(self, url):
+        """Returns the cached page text, or None. Lets the cache stand in for a fetcher when offline."""
+        return self.load(url)[0]
+
+    def store(self, url, text, etag=None, last_modified=None):
+        """Saves a page and its validators, replacing any previous copy atomically."""
+        body_path, meta_path = self._paths(url)
+        validators = {}
+        if etag:
+            validators["etag"] = etag
+        if last_modified:
+            validators["last_modified"] = last_modified
+
+        # Body first, metadata last: a page only counts as cached once its metadata exists
+        _write_atomic(body_path, lz4.frame.compress(text.encode("utf-8")))
+        _write_atomic(meta_path, json.dumps({"url": url, "validators": validators}).encode("utf-8"))
+
+    @staticmethod
+    def conditional_headers(validators):
+        """Builds the If-None-Match/If-Modified-Since headers for a cached page."""
+        headers = {}
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last_modified" in validators:
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+
+def _write_atomic(path, data):
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(data)
+    os.replace(temp_path, path)
@@ -0,0 +1,225 @@
+from bisect import bisect_left
+
+SLOTS_PER_DAY = 144  # 10-minute slots covering the whole day
+
+
+def slot_range_mask(start, end):
+    """Returns a bitmask with bits start..end-1 set (empty if end <= start)."""
+    if end <= start:
+        return 0
+    return ((1 << end) - 1) ^ ((1 << start) - 1)
+
+
+def iter_bits(mask):
+    """Yields the positions of the set bits of mask in increasing order."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def iter_runs(mask):
+    """Yields (start, end) for every run of consecutive set bits in mask, in increasing order."""
+    while mask:
+        start = (mask & -mask).bit_length() - 1
+        shifted = mask >> start
+        length = (shifted ^ (shifted + 1)).bit_length() - 1
+        yield start, start + length
+        mask &= ~(((1 << length) - 1) << start)
+
+
+def build_free_tables(mask):
+    """
+    Builds the lookup tables for one room-day occupancy mask.
+
+    next_busy[s] is the first occupied slot at or after s (SLOTS_PER_DAY if none) and
+    run_start[s] is one past the last occupied slot before s (0 if none), so the free
+    window around any slot is (run_start[s], next_busy[s]).
+    """
+    next_busy = bytearray([SLOTS_PER_DAY]) * (SLOTS_PER_DAY + 1)
+    run_start = bytearray(SLOTS_PER_DAY + 1)
+    filled = 0
+    for busy in iter_bits(mask):
+        next_busy[filled:busy + 1] = bytes([busy]) * (busy + 1 - filled)
+        run_start[busy + 1:] = bytes([busy + 1]) * (SLOTS_PER_DAY - busy)
+        filled = busy + 1
+
+    return bytes(next_busy), bytes(run_start)
+
+
+class Meeting:
+    """One meeting pattern of a section: a room, a slot range and the days it repeats on."""
+
+    __slots__ = ("section_id", "room", "start", "end", "days")
+
+    def __init__(self, section_id, room, start, end, days):
+        self.section_id = section_id  # Position of the parent section in courses.json
+        self.room = room
+        self.start = start
+        self.end = end
+        self.days = days
+
+    def __repr__(self):
+        return f"Meeting({self.section_id}, {self.room!r}, {self.start}, {self.end}, {self.days!r})"
+
+
+class RoomIndexBuilder:
+    """Accumulates meetings per room and day, then freezes them into a RoomIndex."""
+
+    def __init__(self, days):
+        self.days = list(days)
+        self.day_ids = {day: i for i, day in enumerate(self.days)}
+        self.room_masks = {}
+
+    def add_room(self, room):
+        """Registers a room even if it never ends up with a meeting on any day."""
+        if room not in self.room_masks:
+            self.room_masks[room] = [0] * len(self.days)
+        return self.room_masks[room]
+
+    def add_meeting(self, room, days, start, end):
+        """Marks slots start..end-1 as occupied for room on every day in days."""
+        day_masks = self.add_room(room)
+        busy = slot_range_mask(start, end)
+        for day in days:
+            if day in self.day_ids:
+                day_masks[self.day_ids[day]] |= busy
+
+    def build(self, coverage=""):
+        return RoomIndex(self.days, self.room_masks, coverage)
+
+
+class RoomNames:
+    """Prefix lookups over a sorted self.rooms list, where a room's id is its position in it."""
+
+    def __len__(self):
+        return len(self.rooms)
+
+    def __contains__(self, room):
+        return room in self.room_ids
+
+    def prefix_range(self, prefix):
+        """Returns the (lo, hi) room id range whose names start with prefix."""
+        lo = bisect_left(self.rooms, prefix)
+        hi = bisect_left(self.rooms, prefix + "\U0010ffff", lo)
+        return lo, hi
+
+    def rooms_with_prefix(self, prefix):
+        """Returns the sorted room names starting with prefix."""
+        lo, hi = self.prefix_range(prefix)
+        return self.rooms[lo:hi]
+
+    def prefix_count(self, prefix):
+        """Returns how many rooms start with prefix."""
+        lo, hi = self.prefix_range(prefix)
+        return hi - lo
+
+    def closest_prefix(self, prefix):
+        """Returns the longest leading part of prefix that still matches at least one room."""
+        while prefix and not self.prefix_count(prefix):
+            prefix = prefix[:-1]
+        return prefix
+
+
+class RoomIndex(RoomNames):
+    """
+    Room occupancy stored as bitsets.
+
+    Rooms are interned to integer ids in sorted name order, so every name prefix
+    (building, floor or room) maps to one contiguous range of ids. Each room-day is one int
+    whose bit s is set when slot s is occupied, and each day-slot is one int whose bit r
+    is set when room r is occupied, so "which rooms are free at T" is a single mask operation.
+
+    coverage is the room prefix the index was built for; "" means every room on campus.
+    """
+
+    def __init__(self, days, room_masks, coverage=""):
+        self.coverage = coverage
+        self.days = list(days)
+        self.day_ids = {day: i for i, day in enumerate(self.days)}
+        self.rooms = sorted(room_masks)
+        self.room_ids = {room: i for i, room in enumerate(self.rooms)}
+        self.room_masks = [room_masks[room] for room in self.rooms]
+        self.all_rooms_mask = (1 << len(self.rooms)) - 1
+        self.slot_masks = self._build_slot_masks()
+        self.free_tables = self._build_free_tables()
+
+    def _build_slot_masks(self):
+        """Transposes the per-room masks into per-slot masks over all rooms."""
+        # Rooms with the same schedule on a day are grouped first so each distinct pattern is expanded once
+        groups = [{} for _ in self.days]
+        for room_id, day_masks in enumerate(self.room_masks):
+            room_bit = 1 << room_id
+            for day_id, mask in enumerate(day_masks):
+                if mask:
+                    groups[day_id][mask] = groups[day_id].get(mask, 0) | room_bit
+
+        slot_masks = [[0] * SLOTS_PER_DAY for _ in self.days]
+        for day_id, day_groups in enumerate(groups):
+            day_slots = slot_masks[day_id]
+            for mask, room_bits in day_groups.items():
+                for slot in iter_bits(mask):
+                    day_slots[slot] |= room_bits
+        return slot_masks
+
+    def _build_free_tables(self):
+        """Precomputes next-busy/run-start tables per room-day, sharing tables between identical days."""
+        shared = {}
+        free_tables = []
+        for day_masks in self.room_masks:
+            room_tables = []
+            for mask in day_masks:
+                if mask not in shared:
+                    shared[mask] = build_free_tables(mask)
+                room_tables.append(shared[mask])
+            free_tables.append(room_tables)
+        return free_tables
+
+    def update_rooms(self, room_masks):
+        """Replaces the day masks of existing rooms, patching slot masks and lookup tables in place."""
+        for room, day_masks in room_masks.items():
+            room_id = self.room_ids[room]
+            room_bit = 1 << room_id
+            for day_id, (old_mask, new_mask) in enumerate(zip(self.room_masks[room_id], day_masks)):
+                day_slots = self.slot_masks[day_id]
+                for slot in iter_bits(old_mask ^ new_mask):
+                    day_slots[slot] ^= room_bit
+            self.room_masks[room_id] = list(day_masks)
+            self.free_tables[room_id] = [build_free_tables(mask) for mask in day_masks]
+
+    def prefix_mask(self, prefix):
+        """Returns the bitmask of rooms whose names start with prefix."""
+        return slot_range_mask(*self.prefix_range(prefix))
+
+    def day_mask(self, room, day):
+        """Returns the occupancy bitmask of room on day."""
+        return self.room_masks[self.room_ids[room]][self.day_ids[day]]
+
+    def union_mask(self, room_id, days):
+        """Returns the slots room_id is occupied on any of days, as one mask."""
+        day_masks = self.room_masks[room_id]
+        busy = 0
+        for day in days:
+            busy |= day_masks[self.day_ids[day]]
+        return busy
+
+    def slots(self, room, day):
+        """Returns the classic 144-slot list for room on day: -1 when free, 1 when occupied."""
+        mask = self.day_mask(room, day)
+        return [1 if mask >> slot & 1 else -1 for slot in range(SLOTS_PER_DAY)]
+
+    def free_rooms_mask(self, day, slot, candidates=None):
+        """Returns the bitmask of rooms (restricted to candidates) that are free at slot on day."""
+        if candidates is None:
+            candidates = self.all_rooms_mask
+        if not 0 <= slot < SLOTS_PER_DAY:
+            return 0
+        return candidates & ~self.slot_masks[self.day_ids[day]][slot]
+
+    def free_window_at(self, room_id, day, slot):
+        """Returns (start, end) of the free run containing slot, or None if busy."""
+        next_busy, run_start = self.free_tables[room_id][self.day_ids[day]]
+        end = next_busy[slot]
+        if end == slot:
+            return None
+        return run_start[slot], end
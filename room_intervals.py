@@ -0,0 +1,93 @@
+from array import array
+from bisect import bisect_right
+
+from room_index import RoomNames
+
+MINUTES_PER_DAY = 24 * 60
+NO_MEETINGS = (array('H'), array('H'))  # Shared by every room-day without meetings
+
+
+def merge_intervals(intervals):
+    """Sorts (start, end) intervals and merges the ones that overlap or touch; empty ones are dropped."""
+    merged = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class IntervalScheduleBuilder:
+    """Accumulates meetings per room and day at minute precision, then freezes them into an IntervalSchedule."""
+
+    def __init__(self, days):
+        self.days = list(days)
+        self.day_ids = {day: i for i, day in enumerate(self.days)}
+        self.room_meetings = {}
+
+    def add_room(self, room):
+        """Registers a room even if it never ends up with a meeting on any day."""
+        if room not in self.room_meetings:
+            self.room_meetings[room] = [[] for _ in self.days]
+        return self.room_meetings[room]
+
+    def add_meeting(self, room, days, start, end):
+        """Marks minutes start..end-1 as occupied for room on every day in days."""
+        day_meetings = self.add_room(room)
+        for day in days:
+            if day in self.day_ids:
+                day_meetings[self.day_ids[day]].append((start, end))
+
+    def build(self, coverage=""):
+        return IntervalSchedule(self.days, self.room_meetings, coverage)
+
+
+class IntervalSchedule(RoomNames):
+    """
+    Room occupancy stored as sorted, merged busy intervals at minute precision.
+
+    Each room-day keeps two parallel arrays, the start and end minute of every busy interval,
+    so a room used once a week costs a few bytes and every question is a binary search over
+    the handful of meetings it has. Rooms are numbered like RoomIndex, so prefixes are ranges.
+    """
+
+    def __init__(self, days, room_meetings, coverage=""):
+        self.coverage = coverage
+        self.days = list(days)
+        self.day_ids = {day: i for i, day in enumerate(self.days)}
+        self.rooms = sorted(room_meetings)
+        self.room_ids = {room: i for i, room in enumerate(self.rooms)}
+        self.busy = [[self._freeze(meetings) for meetings in room_meetings[room]] for room in self.rooms]
+
+    @staticmethod
+    def _freeze(meetings):
+        merged = merge_intervals(meetings)
+        if not merged:
+            return NO_MEETINGS
+        return array('H', (start for start, _ in merged)), array('H', (end for _, end in merged))
+
+    def free_window_at(self, room_id, day, minute):
+        """Returns (start, end) of the free run containing minute, or None if the room is busy then."""
+        starts, ends = self.busy[room_id][self.day_ids[day]]
+        i = bisect_right(starts, minute)  # Intervals before i start at or before minute
+        if i and ends[i - 1] > minute:
+            return None
+        return (ends[i - 1] if i else 0), (starts[i] if i < len(starts) else MINUTES_PER_DAY)
+
+    def free_windows(self, room_id, day, earliest=0, min_length=1):
+        """Returns the (start, end) free windows of a room on day that end after earliest and last min_length minutes."""
+        starts, ends = self.busy[room_id][self.day_ids[day]]
+        windows = []
+        start = earliest
+        # Only intervals ending after earliest can cut a window, and they are sorted by end too
+        for i in range(bisect_right(ends, earliest), len(starts)):
+            if starts[i] - start >= min_length:
+                windows.append((start, starts[i]))
+            start = max(start, ends[i])
+        if MINUTES_PER_DAY - start >= min_length:
+            windows.append((start, MINUTES_PER_DAY))
+        return windows
@@ -0,0 +1,131 @@
+import os
+import sqlite3
+
+SECTION_FIELDS = ["course_id", "course_name", "description", "section", "type", "units",
+                  "registered", "time", "days", "instructor", "location"]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    {", ".join(f"{field} TEXT" for field in SECTION_FIELDS)}
+);
+CREATE TABLE IF NOT EXISTS meetings (
+    section_id INTEGER NOT NULL REFERENCES sections(id),
+    room TEXT NOT NULL,
+    day TEXT NOT NULL,
+    start_slot INTEGER NOT NULL,
+    end_slot INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rooms (
+    room TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS buildings (
+    code TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS meetings_by_room ON meetings (room, day, start_slot);
+CREATE INDEX IF NOT EXISTS meetings_by_day ON meetings (day, start_slot, end_slot);
+"""
+
+BATCH_SIZE = 5000
+
+
+def prefix_bounds(prefix):
+    """Returns the [low, high) string range covering every value starting with prefix."""
+    return prefix, prefix + "\U0010ffff"
+
+
+class ScheduleStore:
+    """
+    SQLite-backed copy of the schedule: sections, their meetings per room and day, and buildings.
+
+    Free-room questions are answered with indexed range queries on (room, day, start_slot),
+    so nothing has to be loaded into Python first and several processes can share one file.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+
+    def close(self):
+        self.connection.close()
+
+    # --- Writing ---
+
+    @classmethod
+    def create(cls, db_path):
+        """Creates an empty store, replacing any existing file at db_path."""
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        store = cls(db_path)
+        store.connection.executescript("PRAGMA journal_mode=WAL;" + SCHEMA)
+        return store
+
+    def add_buildings(self, building_names):
+        self.connection.executemany("INSERT OR REPLACE INTO buildings (code, name) VALUES (?, ?)",
+                                    building_names.items())
+
+    def add_sections(self, sections):
+        """Inserts (section_id, section dict, meetings) triples, where meetings is a list of Meeting records."""
+        section_rows = []
+        meeting_rows = []
+        rooms = set()
+        for section_id, section, meetings in sections:
+            section_rows.append((section_id, *(section.get(field, "") for field in SECTION_FIELDS)))
+            for meeting in meetings:
+                rooms.add(meeting.room)
+                if meeting.start >= meeting.end:
+                    continue  # Occupies nothing, but the room still exists
+                for day in meeting.days:
+                    meeting_rows.append((section_id, meeting.room, day, meeting.start, meeting.end))
+
+            if len(section_rows) >= BATCH_SIZE:
+                self._insert(section_rows, meeting_rows)
+                section_rows, meeting_rows = [], []
+        self._insert(section_rows, meeting_rows)
+        self.connection.executemany("INSERT OR IGNORE INTO rooms (room) VALUES (?)", ((room,) for room in rooms))
+        self.connection.commit()
+
+    def _insert(self, section_rows, meeting_rows):
+        placeholders = ", ".join("?" * (len(SECTION_FIELDS) + 1))
+        self.connection.executemany(f"INSERT INTO sections VALUES ({placeholders})", section_rows)
+        self.connection.executemany("INSERT INTO meetings VALUES (?, ?, ?, ?, ?)", meeting_rows)
+
+    # --- Queries ---
+
+    def rooms_with_prefix(self, prefix):
+        """Returns the sorted rooms whose names start with prefix."""
+        rows = self.connection.execute(
+            "SELECT room FROM rooms WHERE room >= ? AND room < ? ORDER BY room",
+            prefix_bounds(prefix))
+        return [room for room, in rows]
+
+    def free_windows_at(self, prefix, day, slot):
+        """
+        Returns (room, run_start, next_busy) for every room starting with prefix that is free at slot on day.
+
+        run_start is where the room's current free run began (0 if it has been free all day) and
+        next_busy is the slot its next meeting starts (None if it stays free).
+        """
+        low, high = prefix_bounds(prefix)
+        rows = self.connection.execute("""
+            SELECT r.room,
+                   (SELECT MAX(m.end_slot) FROM meetings m
+                     WHERE m.room = r.room AND m.day = :day AND m.end_slot <= :slot),
+                   (SELECT MIN(m.start_slot) FROM meetings m
+                     WHERE m.room = r.room AND m.day = :day AND m.start_slot > :slot)
+              FROM rooms r
+             WHERE r.room >= :low AND r.room < :high
+               AND NOT EXISTS (SELECT 1 FROM meetings m
+                                WHERE m.room = r.room AND m.day = :day
+                                  AND m.start_slot <= :slot AND m.end_slot > :slot)
+             ORDER BY r.room
+        """, {"day": day, "slot": slot, "low": low, "high": high})
+        return [(room, run_start or 0, next_busy) for room, run_start, next_busy in rows]
+
+    def busy_ranges(self, room, day):
+        """Returns the (start_slot, end_slot) meetings of a room on a day, in start order."""
+        rows = self.connection.execute(
+            "SELECT start_slot, end_slot FROM meetings WHERE room = ? AND day = ? ORDER BY start_slot",
+            (room, day))
+        return rows.fetchall()
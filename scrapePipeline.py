@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+_DONE = object()
+
+
+class PipelineStopped(Exception):
+    """Raised by emit once the pipeline has been stopped (e.g. by Ctrl+C), so fetchers unwind instead of blocking."""
+
+
+def _ignore_interrupts():
+    # Ctrl+C reaches the whole process group; only the main process should react to it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _worker_context():
+    # Workers start once the fetch threads are running; a plain fork could copy a lock one of them holds
+    # (stdout, the rate limiter, a connection pool) into a worker, so they come from a clean process instead
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def run_pipeline(produce, parse, write, queue_size=8, parse_workers=None):
+    """
+    Overlaps fetching, parsing and writing.
+
+    produce(emit) runs on a background thread and calls emit(key, payload) for every unit
+    of work; emit blocks once queue_size payloads are waiting, so fetchers can't run ahead
+    of the parsers. Payloads are parsed as parse(key, payload) on a process pool (all cores
+    by default), and write(key, result) is called on the calling thread as each parse
+    finishes. At most queue_size payloads plus twice the pool size of parses are held at once.
+
+    Returns the number of payloads written. An exception in any stage is re-raised here; if
+    the writer stage fails or is interrupted, emit raises PipelineStopped in the producer and
+    queued parses are cancelled, so the whole pipeline winds down instead of hanging.
+    """
+    work = queue.Queue(maxsize=queue_size)
+    results = queue.Queue()
+    errors = []
+    stopped = threading.Event()
+
+    def emit(key, payload):
+        while not stopped.is_set():
+            try:
+                work.put((key, payload), timeout=0.1)
+                return
+            except queue.Full:
+                pass
+        raise PipelineStopped()
+
+    def producer():
+        try:
+            produce(emit)
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            if not stopped.is_set():
+                work.put(_DONE)
+
+    parse_workers = parse_workers or os.cpu_count() or 1
+    in_flight = threading.Semaphore(2 * parse_workers)
+
+    pool = ProcessPoolExecutor(max_workers=parse_workers, mp_context=_worker_context(), initializer=_ignore_interrupts)
+    try:
+        def dispatcher():
+            submitted = 0
+            while True:
+                item = work.get()
+                if item is _DONE:
+                    break
+                key, payload = item
+                in_flight.acquire()
+                if stopped.is_set():
+                    return
+                future = pool.submit(parse, key, payload)
+                future.add_done_callback(lambda f, key=key: results.put((key, f)))
+                submitted += 1
+            results.put((_DONE, submitted))
+
+        threads = [threading.Thread(target=producer, daemon=True), threading.Thread(target=dispatcher, daemon=True)]
+        for thread in threads:
+            thread.start()
+
+        written = 0
+        total = None
+        while total is None or written < total:
+            key, value = results.get()
+            if key is _DONE:
+                total = value
+                continue
+            try:
+                write(key, value.result())
+            finally:
+                in_flight.release()
+            written += 1
+
+        for thread in threads:
+            thread.join()
+    except BaseException:
+        stopped.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+    if errors:
+        raise errors[0]
+    return written
@@ -1,34 +1,148 @@
-from courseScraper import getCourseHTML
-from htmlScraper import parse_course_html, save_to_json
+from courseScraper import CourseFetcher, course_page_url, WEBREG_URL
+from htmlScraper import PARSERS, compare_parsers, has_sections
 from scrape_building_names import scrape_buildings_from_api, load_buildings_from_txt, merge_and_update_json
+from politeScraper import PoliteScraper
+from responseCache import ResponseCache, CACHE_DIR
+from scrapePipeline import run_pipeline
+from course_shards import SHARD_DIR, ScrapeCheckpoint, assemble_courses_json, content_hash, load_manifest, save_manifest, shard_path, write_shard
 from codes import codes
-import random
+import profiling
+import argparse
+import os
 import time
+from functools import partial
 
-def scrape_courses():
+def fetch_department_pages(scraper, code, base_url=WEBREG_URL):
+    """Fetches every page of one department's course listing; returns None if any page could not be fetched (a missing page ends it)."""
+    print(f"Processing course: {code}")
+    pages = []
+    page_number = 1
+    while(True):
+        html = scraper.get(course_page_url(code, page_number, base_url))
+        
+        if html == None:
+            return None  # A failed page is not the end of the listing; a partial shard would look complete
+        if not has_sections(html):  # Also true of MISSING_PAGE
+            break
+        
+        pages.append(html)
+        page_number +=1
+
+    return pages
+
+def parse_pages(code, pages, parser="fast"):
+    """Parses a department's pages with the chosen parser; 'compare' runs both and reports any mismatch."""
+    sections = []
+    for page_number, html in enumerate(pages, start=1):
+        if parser == "compare":
+            for difference in compare_parsers(html):
+                print(f"Parser mismatch in {code} page {page_number}: {difference}")
+            sections.extend(PARSERS["classic"](html))
+        else:
+            sections.extend(PARSERS[parser](html))
+    return sections
+
+def shard_parser(parser):
+    """Returns the parser whose output a run writes to the shards ('compare' writes the classic parser's)."""
+    return "classic" if parser == "compare" else parser
+
+def department_changed(code, html_hash, manifest, shard_dir=SHARD_DIR, parser="fast"):
+    """Returns True unless the department's current shard was parsed from identical HTML by the same parser."""
+    entry = manifest.get(code)
+    return not (entry and entry["html_hash"] == html_hash and entry.get("parser") == shard_parser(parser)
+                and os.path.exists(shard_path(code, shard_dir)))
+
+def parse_department(key, pages, parser="fast"):
+    """Parser stage of the pipeline; runs in a worker process, so it returns its own timing with the sections."""
+    code, _ = key
+    start = time.perf_counter()
+    sections = parse_pages(code, pages, parser)
+    return sections, time.perf_counter() - start
+
+def scrape_courses(requests_per_second=0.5, workers=4, per_host_limit=2, base_url=WEBREG_URL, cache_dir=CACHE_DIR, offline=False, shard_dir=SHARD_DIR, parser="fast", parse_workers=None, queue_size=8, resume=False):
     output_json = "courses.json"
-    all_parsed_courses = []
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    manifest = load_manifest(shard_dir)
+    for code in [code for code in manifest if code not in codes]:
+        # No longer scraped, so no longer in courses.json either
+        del manifest[code]
+        if os.path.exists(shard_path(code, shard_dir)):
+            os.remove(shard_path(code, shard_dir))
+    checkpoint = ScrapeCheckpoint(shard_dir, resume)
+    pending = [code for code in codes if not checkpoint.is_done(code)]
+    failed = []
+
+    def fetch_department(scraper, code, emit):
+        with profiling.phase("fetch_department"):
+            pages = fetch_department_pages(scraper, code, base_url)
+        if pages is None:
+            # Keep whatever shard we already have, and leave the department for --resume to retry
+            failed.append(code)
+            return
+        profiling.count("pages_fetched", len(pages))
+        # An empty department goes through like any other, so its old shard is replaced by an empty one
+        html_hash = content_hash(pages)
+        # Offline runs exist to re-parse the cache, and compare runs to check every page, so both parse everything
+        if offline or parser == "compare" or department_changed(code, html_hash, manifest, shard_dir, parser):
+            emit((code, html_hash), pages)  # Blocks while the parsers are behind
+        else:
+            checkpoint.mark_done(code)
+
+    def produce(emit):
+        if offline:
+            # Re-parse straight from the cache; nothing is sent to the registration server
+            for code in pending:
+                fetch_department(cache, code, emit)
+            return
+
+        fetcher = CourseFetcher(pool_size=workers, cache=cache)
+        scraper = PoliteScraper(fetcher.get, requests_per_second, max_workers=workers, per_host_limit=per_host_limit)
+        try:
+            scraper.run(lambda s, code: fetch_department(s, code, emit), pending)
+        finally:
+            fetcher.close()
+
+    def write(key, result):
+        # Single writer: shards go to disk as soon as they are parsed, and only this thread touches the manifest
+        code, html_hash = key
+        sections, parse_seconds = result
+        profiling.record("parse_department", parse_seconds)
+        profiling.count("sections_parsed", len(sections))
+        with profiling.phase("write_shard"):
+            manifest[code] = {"html_hash": html_hash, "sections_hash": write_shard(code, sections, shard_dir),
+                              "parser": shard_parser(parser)}
+            save_manifest(manifest, shard_dir)  # Checkpoint: the shard is useful to later runs as soon as it is written
+        checkpoint.mark_done(code)
 
     print(f"Length of codes: {len(codes)}")
-    print(f"Estimated time: {2*len(codes)/60} mintues")
-
-    for code in codes:
-        print(f"Processing course: {code}")
-        page_number = 1
-        while(True):
-            html = getCourseHTML(page_number, code)
-            
-            if html == None:
-                break
-            
-            parsed_courses = parse_course_html(html)
-            all_parsed_courses.extend(parsed_courses)
-            page_number +=1
-            s = random.randint(1,3)
-            print(f"Sleeping for {s} seconds" )
-            time.sleep(random.randint(1,3))
-
-    save_to_json(all_parsed_courses, output_json)
+    if resume:
+        print(f"Resuming: {len(codes) - len(pending)} departments already done, {len(pending)} to go")
+
+    if offline and not cache:
+        print("Error: --offline needs a response cache")
+        exit(1)
+    if not offline:
+        print(f"Estimated time: {len(pending)/requests_per_second/60:.1f} minutes (at least one page per department)")
+
+    try:
+        with profiling.phase("pipeline"):
+            changed = run_pipeline(produce, partial(parse_department, parser=parser), write, queue_size, parse_workers)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted after {len(checkpoint.done)} of {len(codes)} departments; run again with --resume to continue")
+        exit(1)
+    profiling.count("departments_changed", changed)
+
+    save_manifest(manifest, shard_dir)
+    print(f"{changed} of {len(pending)} departments changed")
+    if failed:
+        print(f"{len(failed)} departments could not be fetched: {', '.join(sorted(failed))}")
+        print("Run again with --resume to retry only those")
+    else:
+        checkpoint.finish()
+
+    # Keep the department order of codes.py so the output is stable between runs
+    with profiling.phase("assemble_courses_json"):
+        assemble_courses_json(codes, output_json, shard_dir)
     print(f"Saved parsed courses to {output_json}")
 
 def scrape_buildings():
@@ -45,6 +159,42 @@ def scrape_buildings():
     print("Merging data and updating JSON...")
     merge_and_update_json(api_buildings, txt_buildings, JSON_FILE)
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape course listings into courses.json")
+
+    parser.add_argument("--rate", type=float, default=0.5,
+                        help="Maximum requests per second across all workers (default: 0.5)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Number of departments scraped concurrently (default: 4)")
+    parser.add_argument("--per-host", type=int, default=2,
+                        help="Maximum requests in flight against one host (default: 2)")
+    parser.add_argument("--base-url", default=WEBREG_URL,
+                        help="Registration server to scrape, e.g. a local stub for testing")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help=f"Directory of cached pages (default: {CACHE_DIR}); pass '' to disable caching")
+    parser.add_argument("--offline", action="store_true",
+                        help="Parse pages from the cache only, without contacting the server")
+    parser.add_argument("--parser", choices=["fast", "classic", "compare"], default="fast",
+                        help="HTML parser to use; 'compare' runs both and reports any difference (default: fast)")
+    parser.add_argument("--parse-workers", type=int, default=None,
+                        help="Number of parser processes (default: one per CPU core)")
+    parser.add_argument("--queue-size", type=int, default=8,
+                        help="Departments allowed to wait between fetching and parsing (default: 8)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip departments an interrupted or partly failed scrape already finished")
+    parser.add_argument("--profile", metavar="REPORT",
+                        help=f"Write per-stage timings, memory and counters to REPORT as JSON (or set {profiling.PROFILE_ENV})")
+    parser.add_argument("--cprofile", metavar="FILE",
+                        help=f"Also dump cProfile stats of this process to FILE (or set {profiling.CPROFILE_ENV})")
+
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.profile or args.cprofile:
+        profiling.start(args.profile, args.cprofile)
+    else:
+        profiling.start_from_env()
     # scrape_buildings()
-    scrape_courses()
+    scrape_courses(args.rate, args.workers, args.per_host, args.base_url, args.cache_dir, args.offline,
+                   parser=args.parser, parse_workers=args.parse_workers, queue_size=args.queue_size, resume=args.resume)
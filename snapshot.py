@@ -0,0 +1,60 @@
+import os
+import pickle
+import tempfile
+
+SHARD_SNAPSHOT_FILE = "shard_snapshot.pickle"  # Used when courses come from per-department shards
+INTERVAL_SNAPSHOT_FILE = "interval_snapshot.pickle"  # Minute-precision schedule for --precise queries
+SEARCH_SNAPSHOT_FILE = "building_search.pickle"  # Building name search index, rebuilt when buildings.json changes
+SNAPSHOT_VERSION = 4  # Bump whenever the shape of the cached index changes
+
+
+def file_fingerprint(file_path):
+    """Returns a cheap (size, mtime) fingerprint used to detect changed input files."""
+    stat = os.stat(file_path)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def open_temp_file(path):
+    """Opens a new temporary file next to path for writing; returns (file, temp path). Each writer gets its own."""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(temp_path, 0o666 & ~umask)  # mkstemp makes it private; the replaced file should be readable like before
+    return os.fdopen(fd, 'wb'), temp_path
+
+
+def load_snapshot(input_files, snapshot_file):
+    """Returns the cached index if it was built from the current input files, otherwise None."""
+    try:
+        fingerprints = [file_fingerprint(path) for path in input_files]
+        with open(snapshot_file, 'rb') as file:
+            snapshot = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    if snapshot.get("inputs") != fingerprints:
+        return None
+    return snapshot["data"]
+
+
+def save_snapshot(data, input_files, snapshot_file):
+    """Writes the built index to disk, tagged with the fingerprints of the files it came from."""
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "inputs": [file_fingerprint(path) for path in input_files],
+        "data": data,
+    }
+
+    # Write to a temporary file first so a crash never leaves a half-written snapshot behind
+    temp_file = None
+    try:
+        file, temp_file = open_temp_file(snapshot_file)
+        with file:
+            pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, snapshot_file)
+    except OSError as e:
+        print(f"Warning: could not write index snapshot ({e})")
+        if temp_file and os.path.exists(temp_file):
+            os.remove(temp_file)
@@ -0,0 +1,59 @@
+import unittest
+
+from htmlScraper import compare_parsers, parse_course_html, parse_course_html_fast
+
+
+def course_header(course_id, title="Title"):
+    return (f'<div class="course-header"><a class="course-title-indent">'
+            f'<span class="crsID">{course_id}:</span><span class="crsTitl">{title}</span></a></div>')
+
+
+def accordion(*sections, description="Description"):
+    rows = "".join(
+        f'<div class="section-row"><b>{section}</b><span class="course-section-lecture">Type: Lecture</span>'
+        f'<span class="section_row"></span><span class="section_row"></span><span class="section_row"></span>'
+        f'<span class="section_row">Units: 4</span><span class="section_row">Registered: 10 of 20</span>'
+        f'<span class="section_row">Time: 10:00am-11:50am</span><span class="section_row">Days: Mon, Wed</span>'
+        f'<span class="section_row">Instructor: X</span><span class="section_row">Location: THH101</span></div>'
+        for section in sections)
+    return f'<div class="accordion-content-area"><div class="bs-callout">{description}</div>{rows}</div>'
+
+
+def page(body):
+    return f"<html><body>{body}</body></html>"
+
+
+class ParserParityTest(unittest.TestCase):
+    """The fast parser must return exactly what the classic one does, page for page."""
+
+    def assertSameSections(self, html):
+        self.assertEqual(compare_parsers(html), [])
+        return parse_course_html(html)
+
+    def test_flat_listing(self):
+        sections = self.assertSameSections(page(
+            course_header("CSCI-103") + accordion("29901", "29902") + course_header("CSCI-104") + accordion("29950")))
+        self.assertEqual([(s["course_id"], s["section"]) for s in sections],
+                         [("CSCI-103", "29901"), ("CSCI-103", "29902"), ("CSCI-104", "29950")])
+        self.assertEqual(sections[0]["location"], "THH101")
+
+    def test_accordion_inside_wrapper_is_not_a_sibling(self):
+        # The header's accordion sits in a wrapper, so it is not the header's sibling and has no sections
+        html = page(course_header("CSCI-103") + f'<div class="wrap">{accordion("29901")}</div>')
+        self.assertEqual(self.assertSameSections(html), [])
+        self.assertEqual(parse_course_html_fast(html), [])
+
+    def test_wrapped_header_pairs_within_its_wrapper(self):
+        html = page(f'<div class="wrap">{course_header("CSCI-103")}{accordion("29901")}</div>'
+                    f'<div class="wrap">{course_header("CSCI-104")}</div>{accordion("29950")}')
+        sections = self.assertSameSections(html)
+        self.assertEqual([(s["course_id"], s["section"]) for s in sections], [("CSCI-103", "29901")])
+
+    def test_header_without_title_is_skipped(self):
+        html = page('<div class="course-header"></div>' + accordion("29901") + course_header("CSCI-104") + accordion("29950"))
+        sections = self.assertSameSections(html)
+        self.assertEqual([s["course_id"] for s in sections], ["CSCI-104"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+import setup
+from courseScraper import CourseFetcher, MISSING_PAGE, course_page_url
+from politeScraper import PoliteScraper
+from responseCache import ResponseCache
+from test_html_parsers import accordion, course_header, page
+
+PAGES = {  # Program -> its listing pages; any later page is a 404, like past the end of a real listing
+    "AAA": [page(course_header("AAA-100") + accordion("10001", "10002")),
+            page(course_header("AAA-200") + accordion("10003"))],
+    "BBB": [page(course_header("BBB-100") + accordion("20001"))],
+}
+
+
+class StubWebReg(BaseHTTPRequestHandler):
+    """Serves PAGES with ETags; the first request for every page is answered 503 when the server is flaky."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        code = query.get("Program", [""])[0]
+        page_number = int(query.get("page", ["1"])[0])
+        server = self.server
+        with server.lock:
+            server.requests.append((time.monotonic(), self.path, self.headers.get("If-None-Match")))
+            first = self.path not in server.seen
+            server.seen.add(self.path)
+
+        if server.flaky and first:
+            return self.reply(503, headers={"Retry-After": "0"})
+        pages = PAGES.get(code, [])
+        if page_number > len(pages):
+            return self.reply(404)
+        etag = f'"{code}-{page_number}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self.reply(304, headers={"ETag": etag})
+        self.reply(200, pages[page_number - 1].encode("utf-8"), {"ETag": etag, "Content-Type": "text/html"})
+
+    def reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServerTest(unittest.TestCase):
+    """Runs the scraper against a local stand-in for the registration server."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubWebReg)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.seen = set()
+        self.server.flaky = False
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cookie_file = os.path.join(self.directory, "cookies.txt")
+        with open(self.cookie_file, 'w', encoding='utf-8') as file:
+            file.write("session=stub")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def fetcher(self, cache=None):
+        fetcher = CourseFetcher(cookie_file=self.cookie_file, max_retries=2, backoff=0.01, cache=cache)
+        self.addCleanup(fetcher.close)
+        return fetcher
+
+    def test_retries_after_server_error(self):
+        self.server.flaky = True
+        url = course_page_url("AAA", 1, self.base_url)
+        self.assertEqual(self.fetcher().get(url), PAGES["AAA"][0])
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_gives_up_after_max_retries(self):
+        self.server.flaky = True
+        self.server.seen = _Unseen()  # Every request looks like the first, so every one fails
+        self.assertIsNone(self.fetcher().get(course_page_url("AAA", 1, self.base_url)))
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_missing_page_ends_listing(self):
+        pages = setup.fetch_department_pages(self.fetcher(), "AAA", self.base_url)
+        self.assertEqual(pages, PAGES["AAA"])
+        self.assertEqual(self.fetcher().get(course_page_url("ZZZ", 1, self.base_url)), MISSING_PAGE)
+
+    def test_not_modified_is_served_from_cache(self):
+        cache = ResponseCache(os.path.join(self.directory, "cache"))
+        url = course_page_url("AAA", 1, self.base_url)
+        self.assertEqual(self.fetcher(cache).get(url), PAGES["AAA"][0])
+        self.assertEqual(self.fetcher(cache).get(url), PAGES["AAA"][0])
+        self.assertEqual([etag for _, _, etag in self.server.requests], [None, '"AAA-1"'])
+
+    def test_rate_limit_spaces_requests(self):
+        rate = 20.0
+        scraper = PoliteScraper(self.fetcher().get, requests_per_second=rate, max_workers=4)
+        urls = [course_page_url(code, page_number, self.base_url) for code in ("AAA", "BBB") for page_number in (1, 2, 3)]
+        scraper.run(lambda s, url: s.get(url), urls)
+        times = sorted(when for when, _, _ in self.server.requests)
+        self.assertEqual(len(times), len(urls))
+        # One token up front, then one every 1/rate seconds; allow a little for timer slack
+        self.assertGreaterEqual(times[-1] - times[0], (len(urls) - 1) / rate * 0.9)
+
+    def test_offline_run_matches_online_run_without_requests(self):
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        self.addCleanup(os.chdir, cwd)
+        self.server.flaky = True
+
+        def scrape(offline):
+            with mock.patch.object(setup, "codes", ["AAA", "BBB"]):
+                setup.scrape_courses(requests_per_second=50, workers=2, base_url=self.base_url,
+                                     cache_dir="cache", offline=offline, parse_workers=1)
+            with open("courses.json", 'r', encoding='utf-8') as file:
+                return json.load(file)
+
+        online = scrape(offline=False)
+        self.assertEqual([section["section"] for section in online], ["10001", "10002", "10003", "20001"])
+        request_count = len(self.server.requests)
+        os.remove("courses.json")
+        self.assertEqual(scrape(offline=True), online)
+        self.assertEqual(len(self.server.requests), request_count)
+
+
+class _Unseen(set):
+    def __contains__(self, item):
+        return False
+
+
+if __name__ == "__main__":
+    unittest.main()